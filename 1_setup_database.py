@@ -1,7 +1,8 @@
 """
 Setup Database Script
 Creates the blank Excel structure (Master_Phrase_Library.xlsx) with proper
-worksheets, column headers, and data validation rules.
+worksheets, column headers, and data validation rules, and initialises the
+SQLite phrase store that the other scripts write to.
 
 Run: python 1_setup_database.py
 """
@@ -10,12 +11,11 @@ import sys
 from pathlib import Path
 import logging
 from openpyxl import Workbook
-from openpyxl.worksheet.datavalidation import DataValidation
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 
 from config import (
     MASTER_DB_FILE,
+    STORE_DB_FILE,
     MASTER_DB_SHEET_NAME,
     SECTIONS,
     STANDARD_COLUMNS,
@@ -24,6 +24,8 @@ from config import (
     PROPERTY_TYPES,
     PROPERTY_AGE_BANDS
 )
+import phrase_store
+from excel_export import style_header_cell, make_validation, COLUMN_WIDTHS, DEFAULT_COLUMN_WIDTH
 
 # ============================================================================
 # LOGGING SETUP
@@ -48,22 +50,10 @@ def create_header_row(ws, columns):
         ws: openpyxl worksheet object
         columns: list of column names
     """
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=11)
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
     for col_idx, column_name in enumerate(columns, start=1):
         cell = ws.cell(row=1, column=col_idx)
         cell.value = column_name
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        cell.border = border
+        style_header_cell(cell)
 
 
 def add_data_validation(ws, column_name, col_idx, data_list, start_row=2, end_row=1000):
@@ -80,15 +70,7 @@ def add_data_validation(ws, column_name, col_idx, data_list, start_row=2, end_ro
     """
     try:
         # Create validation with quoted list
-        dv = DataValidation(
-            type="list",
-            formula1=f'"{",".join(str(v) for v in data_list)}"',
-            allow_blank=False
-        )
-        dv.error = f"Please select a valid {column_name}"
-        dv.errorTitle = "Invalid Entry"
-        dv.prompt = f"Select from {column_name} list"
-        dv.promptTitle = column_name
+        dv = make_validation(column_name, data_list)
 
         ws.add_data_validation(dv)
 
@@ -110,21 +92,9 @@ def set_column_widths(ws, columns):
         ws: openpyxl worksheet object
         columns: list of column names
     """
-    width_map = {
-        "Section": 15,
-        "Element": 25,
-        "Sub_Section": 20,
-        "Content": 50,
-        "Condition_Rating": 12,
-        "Property_Style": 18,
-        "Property_Type": 15,
-        "Property_Age": 18,
-        "Source_File": 25
-    }
-
     for col_idx, column_name in enumerate(columns, start=1):
         col_letter = get_column_letter(col_idx)
-        width = width_map.get(column_name, 15)
+        width = COLUMN_WIDTHS.get(column_name, DEFAULT_COLUMN_WIDTH)
         ws.column_dimensions[col_letter].width = width
 
 
@@ -271,6 +241,12 @@ def setup_database():
             file_size = output_path.stat().st_size / 1024  # KB
             logger.info(f"✓ File size: {file_size:.2f} KB")
             logger.info(f"✓ Sheets created: {', '.join(wb.sheetnames)}")
+
+            # Create the phrase store schema (existing phrases are kept)
+            conn = phrase_store.connect(STORE_DB_FILE)
+            phrase_count = phrase_store.count_phrases(conn)
+            conn.close()
+            logger.info(f"✓ Phrase store ready: {Path(STORE_DB_FILE).absolute()} ({phrase_count} phrases)")
             logger.info("=" * 60)
             logger.info("DATABASE SETUP COMPLETE")
             logger.info("=" * 60)
@@ -1,20 +1,43 @@
 """
 Module D: The Harvester - Word Document Parser
 Imports historic "standard phrase" documents (Fast Texts, Paras 2, JBS Templates)
-and sorts them into the clean Excel structure.
+and sorts them into the phrase store (exported to the clean Excel structure).
 
 This script handles messy, inconsistent formatting from legacy Word docs.
 
-Run: python 2_import_word_docs.py
+Run:
+    python 2_import_word_docs.py                        # Folders in IMPORT_DIRS
+    python 2_import_word_docs.py "Archive" -r           # A folder and its subfolders
+    python 2_import_word_docs.py --file "Fast Texts.docx"
+    python 2_import_word_docs.py Archive -r --glob "*Paras*.docx" --workers 8
 
-Ensure your Word documents are in the same folder as this script.
+By default, Word documents are read from the same folder as this script.
+Documents are parsed in a process pool and phrases are written to the store
+in batches, so large archives use every core without holding every phrase
+in memory.
 """
 
 import os
 import re
-import pandas as pd
+import time
+import fnmatch
+import argparse
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from docx import Document
-from config import OUTPUT_FILE, DB_COLUMNS, SECTIONS
+from config import (
+    OUTPUT_FILE,
+    STORE_DB_FILE,
+    REJECTION_REPORT_FILE,
+    DOCX_PARSER,
+    IMPORT_DIRS,
+    IMPORT_GLOBS,
+    IMPORT_RECURSIVE,
+    IMPORT_WORKERS,
+    IMPORT_WRITE_BATCH_SIZE,
+)
+import docx_stream
+import phrase_journal
+import text_cache
 
 # --- Configuration for Pattern Matching ---
 # This maps historic headers to the new "Section" names
@@ -31,6 +54,9 @@ SECTION_MAP = {
     "BUILDING REG": "Building_Regulations"
 }
 
+# Cache key component for text_cache - bump when the reader's output changes
+DOCX_EXTRACTOR_VERSION = "docx-paragraphs-bold-v1"
+
 # Regex to find headers like "4.1 Chimney Stacks" or "D1 - Roof"
 HEADER_PATTERN = re.compile(r"^([A-Z]?\d+[\.\-]?\d*)\s+[:\-]?\s*(.*)", re.IGNORECASE)
 
@@ -51,31 +77,52 @@ def detect_section(header_text):
     return None  # Default fallback if unsure
 
 
-def parse_docx(file_path):
+def read_docx_paragraphs(file_path):
+    """Returns [text, is_bold] for every paragraph in a .docx file (python-docx)."""
+    doc = Document(file_path)
+    return [
+        [paragraph.text, any(run.bold for run in paragraph.runs)]
+        for paragraph in doc.paragraphs
+    ]
+
+
+def parse_docx(file_path, verbose=True):
     """Reads a .docx file and extracts phrases by header."""
-    print(f"Processing {os.path.basename(file_path)}...")
+    if verbose:
+        print(f"Processing {os.path.basename(file_path)}...")
 
     try:
-        doc = Document(file_path)
+        if DOCX_PARSER == "streaming":
+            # Paragraphs go straight from the archive into the parser, so
+            # memory stays flat however long the document. Not cached:
+            # caching would mean holding every paragraph at once
+            return _extract_phrases(docx_stream.iter_docx_paragraphs(file_path), file_path, verbose)
+        # Paragraphs come from the shared text cache when this exact file
+        # has been parsed before
+        paragraphs, _hit = text_cache.cached_extract(
+            file_path, DOCX_EXTRACTOR_VERSION, read_docx_paragraphs
+        )
     except Exception as e:
         print(f"Skipping {file_path}: Not a valid .docx file ({e})")
         return []
+    return _extract_phrases(paragraphs, file_path, verbose)
 
+
+def _extract_phrases(paragraphs, file_path, verbose):
+    """Phrase rows from (text, is_bold) paragraphs, in document order."""
     extracted_data = []
     current_section = "Sections_A-C_H_I_J_K"  # Default bucket
     current_element = "General"
 
-    for paragraph in doc.paragraphs:
-        text = clean_text(paragraph.text)
+    for raw_text, is_bold in paragraphs:
+        text = clean_text(raw_text)
         if len(text) < 5:
             continue  # Skip empty/short lines
 
-        # 1. Check if this line is a Header (e.g., "4.1 Chimney Stacks")
+        # 1. Check if this line is a Header (e.g., "4.1 Chimney Stacks"),
+        #    or looks like a bold header (often used in legacy docs)
         match = HEADER_PATTERN.match(text)
 
-        # Check if it looks like a bold header (often used in legacy docs)
-        is_bold = any(run.bold for run in paragraph.runs)
-
         if (match or is_bold) and len(text) < 60:
             # It's likely a header
             raw_header = match.group(2) if match else text
@@ -87,7 +134,8 @@ def parse_docx(file_path):
 
             # Update the Element (e.g. "Chimney Stacks")
             current_element = raw_header.title()
-            print(f"  -> Found Element: {current_element} (Sheet: {current_section})")
+            if verbose:
+                print(f"  -> Found Element: {current_element} (Sheet: {current_section})")
 
         else:
             # It's content text
@@ -107,59 +155,200 @@ def parse_docx(file_path):
     return extracted_data
 
 
-def save_to_excel(all_data):
-    """Appends the harvested data to the Master Excel file."""
-    if not os.path.exists(OUTPUT_FILE):
-        print(f"Error: {OUTPUT_FILE} not found. Run 1_setup_database.py first.")
-        return
-
-    print(f"\nSaving {len(all_data)} phrases to Excel...")
+def find_documents(paths, patterns=IMPORT_GLOBS, recursive=IMPORT_RECURSIVE):
+    """
+    Word documents to import: files given directly, plus files in the given
+    folders whose names match any of `patterns`. Word lock files (~$...) and
+    hidden folders are skipped; each file is listed once.
+    """
+    found = []
+    seen = set()
+
+    def add(file_path):
+        key = os.path.realpath(file_path)
+        if key not in seen:
+            seen.add(key)
+            found.append(file_path)
+
+    for path in paths:
+        if os.path.isfile(path):
+            add(path)
+            continue
+        if not os.path.isdir(path):
+            print(f"Skipping {path}: not a file or folder")
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for filename in sorted(files):
+                if filename.startswith("~"):
+                    continue
+                if any(fnmatch.fnmatch(filename, pattern) for pattern in patterns):
+                    add(os.path.join(root, filename))
+            if not recursive:
+                break
+    return found
+
+
+def parse_file(file_path):
+    """Process-pool task: returns (file_path, phrases)."""
+    return file_path, parse_docx(file_path, verbose=False)
+
+
+class ImportWriter:
+    """
+    Single writer for the import. Buffers phrases from parsed files and
+    appends them to the store journal in batches; main() applies the
+    journal to the store once at the end (phrase_journal.compact).
+    """
+
+    def __init__(self, batch_size=IMPORT_WRITE_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.buffer = []
+        self.sheet_counts = {}
+
+    def add(self, phrases):
+        self.buffer.extend(phrases)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        phrase_journal.append(self.buffer)
+        for entry in self.buffer:
+            self.sheet_counts[entry["Section"]] = self.sheet_counts.get(entry["Section"], 0) + 1
+        print(f"   -> Journaled batch of {len(self.buffer)} phrases")
+        self.buffer = []
+
+
+def import_documents(file_paths, workers=IMPORT_WORKERS):
+    """
+    Parse documents in a process pool and stream their phrases to the journal.
+
+    At most 2 x workers files are in flight, and phrases are written as
+    soon as a batch fills, so memory does not grow with the archive size.
+
+    Returns:
+        The ImportWriter (per-sheet counts)
+    """
+    writer = ImportWriter()
+    workers = workers or os.cpu_count() or 1
 
-    # Load existing sheets
     try:
-        # We need to read all sheets, append data, and write back
-        with pd.ExcelWriter(OUTPUT_FILE, engine='openpyxl', mode='a', if_sheet_exists='overlay') as writer:
-
-            # Group data by "Section" (which is the Sheet Name)
-            df_all = pd.DataFrame(all_data)
-
-            for sheet_name in df_all['Section'].unique():
-                # Filter data for this sheet
-                sheet_data = df_all[df_all['Section'] == sheet_name]
-
-                # Align columns to match the DB format
-                sheet_data = sheet_data.reindex(columns=DB_COLUMNS)
-
-                # Determine where to write (find the last row)
-                try:
-                    start_row = writer.sheets[sheet_name].max_row
-                except KeyError:
-                    start_row = 0
-
-                # Write to the specific sheet
-                sheet_data.to_excel(writer, sheet_name=sheet_name, index=False, header=False, startrow=start_row)
-                print(f"  -> Added {len(sheet_data)} rows to '{sheet_name}'")
-
-    except Exception as e:
-        print(f"Error saving to Excel: {e}")
+        if workers == 1:
+            for file_path in file_paths:
+                writer.add(parse_docx(file_path))
+            return writer
+
+        queued = iter(file_paths)
+        pending = set()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+
+            def submit_files():
+                while len(pending) < 2 * workers:
+                    file_path = next(queued, None)
+                    if file_path is None:
+                        return
+                    pending.add(pool.submit(parse_file, file_path))
+
+            submit_files()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.discard(future)
+                    file_path, phrases = future.result()
+                    print(f"Processed {file_path}: {len(phrases)} phrases")
+                    writer.add(phrases)
+                submit_files()
+    finally:
+        writer.flush()
+
+    return writer
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import legacy Word documents into the phrase library.")
+    parser.add_argument(
+        "paths", nargs="*", default=None, metavar="PATH",
+        help=f"Folders or .docx files to import (default: {', '.join(IMPORT_DIRS)})"
+    )
+    parser.add_argument(
+        "--file", action="append", default=[], metavar="FILE",
+        help="Import a single document (repeatable)"
+    )
+    parser.add_argument(
+        "--glob", action="append", default=None, metavar="PATTERN",
+        help=f"Filename pattern to import from folders (repeatable; default: {' '.join(IMPORT_GLOBS)})"
+    )
+    parser.add_argument(
+        "-r", "--recursive", action="store_true", default=IMPORT_RECURSIVE,
+        help="Also scan subfolders"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=IMPORT_WORKERS,
+        help="Parser processes (default: one per CPU core)"
+    )
+    return parser.parse_args()
 
 
 def main():
-    all_extracted_phrases = []
+    args = parse_args()
+    paths = (args.paths or []) + args.file
+    if not paths:
+        paths = IMPORT_DIRS
+
+    file_paths = find_documents(paths, args.glob or IMPORT_GLOBS, args.recursive)
+    if not file_paths:
+        print("\nNo Word documents found. Check your folders and --glob patterns.")
+        return
 
-    # Look for all .docx files in the current folder
-    for filename in os.listdir('.'):
-        if filename.endswith(".docx") and not filename.startswith("~"):
-            file_path = os.path.join('.', filename)
-            phrases = parse_docx(file_path)
-            all_extracted_phrases.extend(phrases)
+    workers = min(args.workers or os.cpu_count() or 1, len(file_paths))
+    print(f"Importing {len(file_paths)} document(s) with {workers} worker(s)...\n")
 
-    if all_extracted_phrases:
-        save_to_excel(all_extracted_phrases)
+    started = time.perf_counter()
+    try:
+        writer = import_documents(file_paths, workers)
+    except BaseException:
+        # Interrupted or failed: still apply the documents journaled so far,
+        # then let the original error through
+        try:
+            phrase_journal.compact()
+        except Exception as e:
+            print(f"Error saving to phrase store: {e}")
+            print("The journal has been kept and will be applied on the next run.")
+        raise
+    total = sum(writer.sheet_counts.values())
+
+    # Apply the journal in one transaction (and refresh the Excel export once)
+    try:
+        totals = phrase_journal.compact()
+    except Exception as e:
+        print(f"Error saving to phrase store: {e}")
+        print("The journal has been kept and will be applied on the next run.")
+        return
+    elapsed = time.perf_counter() - started
+
+    # Sheet counts are rows parsed; validation and dedup decide what is stored
+    print(f"\nParsed {total} phrases:")
+    for sheet_name, count in writer.sheet_counts.items():
+        print(f"  -> {count} rows for '{sheet_name}'")
+    print(f"  -> {totals['inserted']} rows committed to {STORE_DB_FILE} "
+          f"({totals['merged']} near-duplicates merged into existing phrases)")
+    if totals["rejected"]:
+        print(f"  -> {totals['rejected']} rows rejected by validation (see {REJECTION_REPORT_FILE})")
+    print(f"  -> {len(file_paths)} files in {elapsed:.1f}s "
+          f"({len(file_paths) / max(elapsed, 1e-6):.1f} files/s, "
+          f"{total / max(elapsed, 1e-6):.0f} phrases/s)")
+    if totals["exported"]:
+        print(f"  -> Refreshed {OUTPUT_FILE}")
+
+    if total:
         print("\nSuccess! Legacy phrases imported.")
     else:
         print("\nNo phrases found. Check your .docx files.")
 
+    text_cache.prune()
+
 
 if __name__ == "__main__":
     main()
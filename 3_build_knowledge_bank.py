@@ -2,9 +2,12 @@
 Script 3: Build the Knowledge Bank
 Scans your USEFUL_DOCS folder and builds a JSON "Brain" from RICS/Building Regs files.
 
-This creates a knowledge bank that provides context for the AI Report Miner.
+This creates a knowledge bank that provides context for the AI Report Miner,
+plus a passage index (knowledge_index.json) the miner uses to retrieve only
+the reference passages relevant to each report.
 
-Run: python 3_build_knowledge_bank.py
+Run: python 3_build_knowledge_bank.py          (incremental - only new/changed files)
+     python 3_build_knowledge_bank.py --full   (re-extract everything)
 
 Ensure your reference documents (RICS rules, Building Regulations, etc.)
 are in the USEFUL_DOCS folder.
@@ -12,13 +15,19 @@ are in the USEFUL_DOCS folder.
 
 import os
 import json
-import pdfplumber
+import argparse
 import re
 from docx import Document
+from config import KNOWLEDGE_BANK_FILE, KNOWLEDGE_INDEX_FILE, KNOWLEDGE_STATE_FILE
+import knowledge_index
+import pdf_extract
+import text_cache
 
 # DIRECTORY SETTINGS
 DOCS_DIR = os.path.join(os.getcwd(), "USEFUL_DOCS")
-OUTPUT_KB = "knowledge_bank.json"
+OUTPUT_KB = KNOWLEDGE_BANK_FILE
+OUTPUT_INDEX = KNOWLEDGE_INDEX_FILE
+OUTPUT_STATE = KNOWLEDGE_STATE_FILE
 
 
 def clean_text(text):
@@ -28,35 +37,98 @@ def clean_text(text):
     return re.sub(r'\s+', ' ', text).strip()
 
 
-def extract_from_pdf(filepath):
-    """Extract text from PDF."""
-    print(f"   -> PDF: {os.path.basename(filepath)}")
-    text = ""
-    try:
-        with pdfplumber.open(filepath) as pdf:
-            for page in pdf.pages:
-                extracted = page.extract_text()
-                if extracted:
-                    text += extracted + "\n"
-    except Exception as e:
-        print(f"      [Error] Could not read PDF: {e}")
-    return text
+# Cache key component for Word documents - bump when the output changes
+DOCX_EXTRACTOR_VERSION = "docx-paragraphs-v1"
+
+
+def extract_pdfs(files):
+    """
+    Extract text from several PDFs. Cached text is reused; the rest are
+    extracted in parallel (pages fanned out over a process pool).
+
+    Args:
+        files: list of (filepath, sha256) pairs
+
+    Returns:
+        {filepath: text}
+    """
+    if not files:
+        return {}
+
+    texts = {}
+    to_extract = {}
+    for filepath, file_hash in files:
+        pages = text_cache.get(file_hash, pdf_extract.EXTRACTOR_VERSION)
+        if pages is not None:
+            print(f"   -> PDF: {os.path.basename(filepath)} (text cache)")
+            texts[filepath] = pdf_extract.join_pages(pages)
+        else:
+            print(f"   -> PDF: {os.path.basename(filepath)}")
+            to_extract[filepath] = file_hash
+
+    if not to_extract:
+        return texts
+
+    results, stats = pdf_extract.extract_documents(list(to_extract))
+
+    for filepath, result in results.items():
+        if result.error:
+            print(f"      [Error] Could not read PDF {os.path.basename(filepath)}: {result.error}")
+        if result.failed_pages:
+            print(f"      [Warning] {os.path.basename(filepath)}: "
+                  f"{result.failed_pages} page(s) failed or timed out")
+        elif not result.error:
+            text_cache.put(to_extract[filepath], pdf_extract.EXTRACTOR_VERSION,
+                           result.pages, os.path.basename(filepath))
+        texts[filepath] = pdf_extract.join_pages(result.pages)
 
+    print(f"   -> Extracted {stats['pages']} pages from {stats['documents']} PDF(s) "
+          f"in {stats['seconds']:.1f}s ({stats['pages_per_second']:.1f} pages/s, "
+          f"{pdf_extract.default_workers()} workers)")
+    return texts
 
-def extract_from_docx(filepath):
-    """Extract text from Word Doc."""
+
+def _read_docx_paragraphs(filepath):
+    doc = Document(filepath)
+    return [p.text for p in doc.paragraphs if p.text.strip()]
+
+
+def extract_from_docx(filepath, file_hash=None):
+    """Extract text from Word Doc (via the shared text cache)."""
     print(f"   -> DOCX: {os.path.basename(filepath)}")
     try:
-        doc = Document(filepath)
-        return "\n".join([p.text for p in doc.paragraphs if p.text.strip()])
+        paragraphs, _hit = text_cache.cached_extract(
+            filepath, DOCX_EXTRACTOR_VERSION, _read_docx_paragraphs, file_hash
+        )
+        return "\n".join(paragraphs)
     except Exception as e:
         print(f"      [Error] Could not read DOCX: {e}")
         return ""
 
 
-def build_knowledge_bank():
+def load_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return default
+
+
+def write_json_atomic(path, data, **kwargs):
+    """Write JSON to a temp file and rename it over the target in one step."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, **kwargs)
+    os.replace(tmp_path, path)
+
+
+def build_knowledge_bank(full_rebuild=False):
     """
     Main function to build knowledge bank from USEFUL_DOCS folder.
+
+    Rebuilds are incremental: a document is only re-extracted if it is new or
+    its size/mtime changed and its content hash differs from the last build.
+    Removed documents are dropped. Pass full_rebuild=True to re-extract all.
     """
     print("=" * 70)
     print("PHRASE LIBRARY ENGINE - KNOWLEDGE BANK BUILDER")
@@ -71,11 +143,21 @@ def build_knowledge_bank():
         print(f"  - Other reference PDFs/DOCXs")
         return
 
+    # Previous build (text per file, and the file state it was built from)
+    if full_rebuild:
+        previous_store, previous_state = {}, {}
+    else:
+        previous_store = load_json(OUTPUT_KB, {})
+        previous_state = load_json(OUTPUT_STATE, {})
+
     knowledge_store = {}
-    file_count = 0
+    state = {}
+    to_extract = []
+    extracted_count = 0
+    reused_count = 0
 
     # Iterate over files in USEFUL_DOCS
-    for filename in os.listdir(DOCS_DIR):
+    for filename in sorted(os.listdir(DOCS_DIR)):
         filepath = os.path.join(DOCS_DIR, filename)
 
         # Skip hidden files and non-files
@@ -84,38 +166,85 @@ def build_knowledge_bank():
         if not os.path.isfile(filepath):
             continue
 
-        content = ""
-        if filename.lower().endswith(".pdf"):
-            content = extract_from_pdf(filepath)
-        elif filename.lower().endswith(".docx"):
-            content = extract_from_docx(filepath)
-        elif filename.lower().endswith(".doc"):
+        lower = filename.lower()
+        if lower.endswith(".doc"):
             # .doc files are not easily supported by python-docx
             # but we include a note
             print(f"   -> DOC: {filename} (Note: .doc files not supported, use .docx)")
             continue
-        else:
+        if not (lower.endswith(".pdf") or lower.endswith(".docx")):
             # Skip unsupported formats
             continue
 
+        # Unchanged since the last build? Reuse its text.
+        stat = os.stat(filepath)
+        file_state = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        old_state = previous_state.get(filename)
+        if old_state and filename in previous_store:
+            if (old_state.get("mtime_ns"), old_state.get("size")) == (stat.st_mtime_ns, stat.st_size):
+                file_state["sha256"] = old_state.get("sha256")
+            else:
+                file_state["sha256"] = text_cache.file_sha256(filepath)
+            if file_state["sha256"] and file_state["sha256"] == old_state.get("sha256"):
+                knowledge_store[filename] = previous_store[filename]
+                state[filename] = file_state
+                reused_count += 1
+                continue
+        else:
+            file_state["sha256"] = text_cache.file_sha256(filepath)
+
+        to_extract.append((filename, filepath, file_state))
+
+    # Extract new/changed documents (PDFs in parallel)
+    pdf_texts = extract_pdfs([
+        (fp, fs["sha256"]) for _, fp, fs in to_extract if fp.lower().endswith(".pdf")
+    ])
+    for filename, filepath, file_state in to_extract:
+        if filepath.lower().endswith(".pdf"):
+            content = pdf_texts.get(filepath, "")
+        else:
+            content = extract_from_docx(filepath, file_state["sha256"])
+
         if content:
             # Categorize by filename
             # e.g. Key="RICS_Module_A", Value="Full Text..."
             knowledge_store[filename] = clean_text(content)
-            file_count += 1
-            print(f"      ✓ Indexed: {len(content)} characters")
+            state[filename] = file_state
+            extracted_count += 1
+            print(f"      ✓ Indexed {filename}: {len(content)} characters")
+
+    removed = sorted(set(previous_store) - set(knowledge_store))
+    for filename in removed:
+        print(f"   -> Removed: {filename}")
+
+    changed = extracted_count > 0 or bool(removed) or not os.path.exists(OUTPUT_INDEX)
+    if changed:
+        # Save to JSON (atomically, so the miner never reads a partial bank)
+        write_json_atomic(OUTPUT_KB, knowledge_store, indent=4)
+
+        # Chunk into passages and build the BM25 retrieval index
+        index = knowledge_index.build_index(knowledge_store)
+        knowledge_index.save_index(index, OUTPUT_INDEX)
 
-    # Save to JSON
-    with open(OUTPUT_KB, 'w', encoding='utf-8') as f:
-        json.dump(knowledge_store, f, ensure_ascii=False, indent=4)
+    # Always refresh the state file (mtimes may have moved without content changes)
+    write_json_atomic(OUTPUT_STATE, state, indent=2)
+    text_cache.prune()
 
     print("\n" + "=" * 70)
-    print(f"✓ Knowledge Bank saved to '{OUTPUT_KB}'")
-    print(f"✓ Indexed {file_count} documents")
+    if changed:
+        print(f"✓ Knowledge Bank saved to '{OUTPUT_KB}'")
+        print(f"✓ Passage index saved to '{OUTPUT_INDEX}' ({len(index['passages'])} passages)")
+    else:
+        print(f"✓ Knowledge Bank '{OUTPUT_KB}' is up to date")
+    print(f"✓ {len(knowledge_store)} documents: {extracted_count} extracted, "
+          f"{reused_count} unchanged, {len(removed)} removed")
     print("=" * 70)
 
     return knowledge_store
 
 
 if __name__ == "__main__":
-    build_knowledge_bank()
+    parser = argparse.ArgumentParser(description="Build the knowledge bank from USEFUL_DOCS.")
+    parser.add_argument("--full", action="store_true", help="Re-extract every document")
+    args = parser.parse_args()
+    build_knowledge_bank(full_rebuild=args.full)
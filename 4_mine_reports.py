@@ -9,23 +9,78 @@ Setup:
 1. Set your API key: export ANTHROPIC_API_KEY="your-key-here"
    OR set it directly in this script below.
 2. Create a REPORTS_TO_MINE folder and place PDF reports inside.
-3. Run: python 4_mine_reports.py
+3. Run: python 4_mine_reports.py [--concurrency N] [--force PATTERN]
+   Or:  python 4_mine_reports.py --batch [--no-wait]   # Message Batches, for backfills
+   Or:  python 4_mine_reports.py --cache-only --force "*"   # Replay cached responses, no API calls
+
+Reports flow through a pipeline: PDF extraction and local anonymization
+(anonymize.py), model calls (up to MINER_CONCURRENCY in flight, with
+backoff on rate limits/overload) and a single writer that appends each
+finished report to the store journal (phrase_journal.py), which is applied
+to the store once per run. Responses are streamed and parsed phrase by
+phrase (json_stream.py): a malformed phrase is skipped on its own, and
+output cut off by max_tokens is continued from the last complete phrase.
+Complete responses are kept in an on-disk cache (response_cache.py), so a
+rerun with unchanged prompts and settings makes no model calls for them.
+Prompts are estimated before sending and split further if over
+MINER_MAX_PROMPT_TOKENS. Per-report metrics (timings, tokens, stop reasons,
+rows) go to the run log (run_log.py) and a summary table ends each run.
+Set ANTHROPIC_BASE_URL to point the miner at a local stub of the messages API.
+
+A manifest in the phrase store records each report's content hash, status,
+phrase count, timestamp and model. Reruns skip reports already mined, so an
+interrupted run resumes where it stopped without duplicating rows.
 
 The AI will:
 - Extract observations from the PDF
 - Remove specific addresses/names
 - Classify by property age and style
-- Check against RICS rules from knowledge_bank.json
-- Save results to the Master Excel database
+- Check against the most relevant RICS passages from knowledge_index.json
+- Save results to the phrase store (exported to the Master Excel database)
 """
 
 import os
 import json
-import pandas as pd
-import pdfplumber
+import time
+import random
+import argparse
+import fnmatch
+import threading
+from collections import Counter
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 import anthropic
-from config import DB_COLUMNS, OUTPUT_FILE
-from openpyxl import load_workbook
+import httpx
+from config import (
+    MINER_CONCURRENCY,
+    MINER_EXTRACT_WORKERS,
+    MINER_MAX_RETRIES,
+    MINER_BACKOFF_BASE,
+    MINER_BACKOFF_MAX,
+    KNOWLEDGE_BANK_FILE,
+    KNOWLEDGE_INDEX_FILE,
+    PROMPT_CACHING,
+    KB_CACHED_CONTEXT_TOKEN_BUDGET,
+    REJECTION_REPORT_FILE,
+    ANONYMIZE_BEFORE_SENDING,
+    MINER_MAX_OUTPUT_TOKENS,
+    MINER_MAX_CONTINUATIONS,
+    MINER_MAX_PROMPT_TOKENS,
+    MINER_BATCH_MAX_REQUESTS,
+    MINER_BATCH_POLL_SECONDS,
+    RESPONSE_CACHE,
+)
+import phrase_store
+import phrase_journal
+import knowledge_index
+import pdf_extract
+import text_cache
+import anonymize
+import report_chunks
+import phrase_dedup
+import json_stream
+import response_cache
+import run_log
 
 # --- CONFIGURATION ---
 # Place your PDF REPORTS (the ones you want to mine) in this folder:
@@ -38,58 +93,160 @@ API_KEY = os.environ.get("ANTHROPIC_API_KEY")
 # Model to use (Haiku is fast and cheap, Sonnet is more capable)
 MODEL = "claude-3-5-haiku-20241022"
 
+# HTTP statuses worth retrying: rate limited, server errors, overloaded
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504, 529}
+
+# Smallest piece of report text an over-budget prompt is split into
+MIN_SPLIT_TOKENS = 250
+
 
 def load_knowledge_bank():
-    """Loads the RICS rules we just indexed."""
+    """
+    Loads the passage index of the RICS rules we just indexed. Falls back to
+    indexing knowledge_bank.json in memory if the index hasn't been built.
+    """
     try:
-        with open("knowledge_bank.json", "r") as f:
+        index = knowledge_index.load_index(KNOWLEDGE_INDEX_FILE)
+        sources = {p["source"] for p in index["passages"]}
+        print(f"✓ Loaded knowledge index: {len(index['passages'])} passages "
+              f"from {len(sources)} reference documents")
+        return index
+    except FileNotFoundError:
+        pass
+
+    try:
+        with open(KNOWLEDGE_BANK_FILE, "r", encoding="utf-8") as f:
             kb = json.load(f)
             print(f"✓ Loaded knowledge bank with {len(kb)} reference documents")
-            return kb
+            return knowledge_index.build_index(kb)
     except FileNotFoundError:
         print("⚠ Warning: knowledge_bank.json not found.")
         print("  Run 3_build_knowledge_bank.py first, or the AI will work without RICS context.")
         return {}
 
 
-def extract_text_from_pdf(pdf_path):
-    """Extract all text from a PDF file."""
-    text = ""
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                t = page.extract_text()
-                if t:
-                    text += f"\n--- Page {page_num} ---\n{t}"
-    except Exception as e:
-        print(f"   [Error] Could not extract from PDF: {e}")
-    return text
+def extract_text_from_pdf(pdf_path, file_hash=None):
+    """
+    Extract all text from a PDF file, with "--- Page N ---" markers.
+    Runs in an extraction worker process; pages come from the shared text
+    cache when this report has been extracted before.
 
+    Returns:
+        (text, ExtractionResult, cache_hit)
+    """
+    if file_hash:
+        pages = text_cache.get(file_hash, pdf_extract.EXTRACTOR_VERSION)
+        if pages is not None:
+            result = pdf_extract.ExtractionResult(pages, 0.0, 0, None)
+            return pdf_extract.join_pages_with_markers(pages), result, True
 
-def analyze_with_claude(report_text, knowledge_bank):
+    result = pdf_extract.extract_page_range(pdf_path)
+    if file_hash and not result.error and not result.failed_pages:
+        text_cache.put(file_hash, pdf_extract.EXTRACTOR_VERSION, result.pages,
+                       os.path.basename(pdf_path))
+    return pdf_extract.join_pages_with_markers(result.pages), result, False
+
+
+def prepare_report(pdf_path, file_hash=None):
     """
-    Sends text to Claude to extract and clean phrases.
-    Returns a list of phrase dictionaries.
+    Extraction worker task: extract a report's text and, with
+    ANONYMIZE_BEFORE_SENDING, scrub it locally (see anonymize.py). The text
+    cache keeps the raw pages, so changing the patterns needs no re-extraction.
+
+    Returns:
+        (text, ExtractionResult, cache_hit, anonymization hits)
     """
+    text, result, cache_hit = extract_text_from_pdf(pdf_path, file_hash)
+    hits = Counter()
+    if ANONYMIZE_BEFORE_SENDING:
+        text, hits = anonymize.anonymize(text)
+    return text, result, cache_hit, hits
+
+
+def _retry_delay(error, attempt):
+    """Seconds to wait before retrying: honour retry-after, else exponential backoff."""
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        try:
+            return min(float(retry_after), MINER_BACKOFF_MAX)
+        except (TypeError, ValueError):
+            pass
+    delay = min(MINER_BACKOFF_BASE * (2 ** attempt), MINER_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _is_retryable(error):
+    """Rate limits (429), overload (529), server and connection errors."""
+    return (
+        not isinstance(error, anthropic.APIStatusError)
+        or error.status_code in RETRYABLE_STATUS_CODES
+    )
+
+
+def call_with_backoff(label, call, *args, **kwargs):
+    """Call an API method, retrying retryable errors with backoff."""
+    for attempt in range(MINER_MAX_RETRIES + 1):
+        try:
+            return call(*args, **kwargs)
+        except (anthropic.APIStatusError, anthropic.APIConnectionError) as e:
+            if not _is_retryable(e) or attempt == MINER_MAX_RETRIES:
+                raise
+            delay = _retry_delay(e, attempt)
+            print(f"   [{label}] API busy ({e.__class__.__name__}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
 
-    # Prepare knowledge bank context (truncate if massive)
-    kb_context = json.dumps(knowledge_bank, ensure_ascii=False)[:50000]
 
-    prompt = f"""
+def stream_message_with_backoff(client, label, parser, **kwargs):
+    """
+    Stream a messages call into `parser` (json_stream.JsonArrayParser),
+    retrying rate-limit (429), overload (529), server and connection errors
+    with backoff. Other API errors are raised at once.
+
+    A retry first rewinds the parser to its last complete phrase. If the
+    stream breaks off after new phrases have arrived, they are kept and None
+    is returned, so the caller can ask for the rest instead of starting over.
+
+    Returns:
+        the final Message, or None if the stream broke off
+    """
+    for attempt in range(MINER_MAX_RETRIES + 1):
+        phrases_before = len(parser.objects)
+        try:
+            with client.messages.stream(**kwargs) as stream:
+                for text in stream.text_stream:
+                    parser.feed(text)
+                return stream.get_final_message()
+        except (anthropic.APIStatusError, anthropic.APIConnectionError, httpx.TransportError) as e:
+            if len(parser.objects) > phrases_before:
+                print(f"   [{label}] Stream interrupted ({e.__class__.__name__}) after "
+                      f"{len(parser.objects)} phrases")
+                return None
+            parser.rewind()
+            if not _is_retryable(e) or attempt == MINER_MAX_RETRIES:
+                raise
+            delay = _retry_delay(e, attempt)
+            print(f"   [{label}] API busy ({e.__class__.__name__}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+
+SYSTEM_PROMPT = "You are a JSON-only output machine. Return only valid JSON arrays."
+
+# Static instructions: identical for every report, so they sit in the cached prefix
+INSTRUCTIONS = """
 You are an expert RICS Surveyor building a comprehensive phrase library.
 
 YOUR TASK:
-1. Read the survey report text below
+1. Read the survey report text you are given
 2. Extract all key observations about building elements and their condition
 3. ANONYMIZE them (remove specific addresses, postcodes, client names, dates, property numbers)
+   Placeholders such as [ADDRESS], [POSTCODE], [PHONE] or [REDACTED] mark details
+   already removed; never try to reconstruct them, and don't copy them into phrases
 4. GENERALIZE them (e.g., "12 High Street" → "the property", specific dates → "recently")
 5. CLASSIFY each phrase (Section, Element, Condition Rating 1-3)
 6. INFER property age and style from clues in the report
 7. Cross-check against RICS rules to ensure accuracy
 
-RICS REFERENCE MATERIAL (Building Standards):
-{kb_context}
-
 CLASSIFICATION GUIDE:
 - Section: Choose ONE: "External", "Internal", "Services", "Grounds", "Overall"
 - Element: What building part? "Roof", "Walls", "Windows", "Electrical", etc.
@@ -102,7 +259,7 @@ OUTPUT INSTRUCTIONS:
 Return ONLY a JSON array with NO markdown, NO explanation.
 Each object must have all these keys:
 [
-    {{
+    {
         "Section": "External",
         "Element": "Chimney Stacks",
         "Sub_Section": "Defects",
@@ -110,8 +267,8 @@ Each object must have all these keys:
         "Condition_Rating": "2",
         "Property_Style": "Semi-Detached",
         "Property_Age": "1900-1918"
-    }},
-    {{
+    },
+    {
         "Section": "Internal",
         "Element": "Walls",
         "Sub_Section": "Condition",
@@ -119,97 +276,875 @@ Each object must have all these keys:
         "Condition_Rating": "2",
         "Property_Style": "Semi-Detached",
         "Property_Age": "1900-1918"
-    }}
+    }
 ]
+"""
+
+# Query used to pick the core reference passages placed in the cached prefix
+CORE_REFERENCE_QUERY = (
+    "condition rating defects repair roof chimney walls windows doors floors "
+    "ceilings damp timber electrical heating drainage water gas services "
+    "grounds boundaries building regulations"
+)
+
+
+class UsageTotals:
+    """Thread-safe token usage totals for a mining run, including prompt cache hits."""
+
+    FIELDS = (
+        "input_tokens",
+        "output_tokens",
+        "cache_creation_input_tokens",
+        "cache_read_input_tokens",
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.totals = dict.fromkeys(self.FIELDS, 0)
+
+    def record(self, usage):
+        with self._lock:
+            self.calls += 1
+            for field in self.FIELDS:
+                self.totals[field] += getattr(usage, field, None) or 0
+
+    def report(self):
+        """Print token usage and the prompt cache hit rate for the run."""
+        t = self.totals
+        prompt_tokens = (
+            t["input_tokens"] + t["cache_creation_input_tokens"] + t["cache_read_input_tokens"]
+        )
+        hit_rate = (t["cache_read_input_tokens"] / prompt_tokens * 100) if prompt_tokens else 0.0
+        print(f"API calls: {self.calls}")
+        print(f"Prompt tokens: {prompt_tokens} "
+              f"(cache read: {t['cache_read_input_tokens']}, "
+              f"cache write: {t['cache_creation_input_tokens']}, "
+              f"uncached: {t['input_tokens']})")
+        print(f"Prompt cache hit rate: {hit_rate:.1f}%")
+        print(f"Output tokens: {t['output_tokens']}")
+
+
+class MiningContext:
+    """
+    Everything shared by the model calls of one run: the API client, the
+    knowledge index, the cached prompt prefix and the usage totals. With
+    `cache_only`, responses come from the response cache alone and there is
+    no client.
+    """
 
-REPORT TEXT TO MINE:
-{report_text[:100000]}
+    def __init__(self, kb_index, client=None, cache_only=False):
+        self.kb_index = kb_index
+        self.cache_only = cache_only
+        self.client = None if cache_only else (client or create_client())
+        self.usage = UsageTotals()
+        self.redactions = Counter()   # Local anonymization hits, by pattern
+        self.cached_responses = 0     # Requests answered from the response cache
+        self._cache_lock = threading.Lock()
+
+        # Core reference passages are chosen once per run so the prefix is
+        # byte-identical for every report (a requirement for cache hits)
+        self.core_passages = knowledge_index.retrieve(
+            kb_index, CORE_REFERENCE_QUERY,
+            top_k=len(kb_index.get("passages", ())) if kb_index else 0,
+            token_budget=KB_CACHED_CONTEXT_TOKEN_BUDGET
+        )
+        self.system = build_system_prompt(self.core_passages)
+
+        # The first call of the run goes out alone and writes the prompt cache;
+        # concurrent calls wait for it so they read the cache instead of all
+        # paying to write it
+        self._warm_lock = threading.Lock()
+        self._warm_started = False
+        self._warmed = threading.Event()
+        if not PROMPT_CACHING:
+            self._warmed.set()
+
+    def wait_for_cache(self):
+        """Return True if the caller should make the cache-warming call."""
+        with self._warm_lock:
+            first = not self._warm_started
+            self._warm_started = True
+        if not first:
+            self._warmed.wait()
+        return first
+
+    def cache_ready(self):
+        self._warmed.set()
+
+    def record_cached_response(self):
+        with self._cache_lock:
+            self.cached_responses += 1
+
+
+def build_system_prompt(core_passages):
+    """
+    Build the stable prompt prefix: system role, instructions and core RICS
+    reference material. With PROMPT_CACHING the last block carries a cache
+    breakpoint, so everything up to it is cached by the API.
+    """
+    reference = knowledge_index.format_passages(core_passages)
+    prefix = INSTRUCTIONS
+    if reference:
+        prefix += f"\nRICS REFERENCE MATERIAL (Building Standards):\n{reference}\n"
+
+    prefix_block = {"type": "text", "text": prefix}
+    if PROMPT_CACHING:
+        prefix_block["cache_control"] = {"type": "ephemeral"}
+    return [{"type": "text", "text": SYSTEM_PROMPT}, prefix_block]
+
+
+def build_report_prompt(report_text, kb_context):
+    """Build the per-report suffix: report-specific reference passages and the report."""
+    prompt = ""
+    if kb_context:
+        prompt += f"ADDITIONAL RICS REFERENCE MATERIAL (relevant to this report):\n{kb_context}\n\n"
+    prompt += f"""REPORT TEXT TO MINE:
+{report_text}
 
 Remember: Return ONLY the JSON array. No other text.
 """
+    return prompt
+
+
+def build_request(report_text, context, label="report"):
+    """
+    Build the messages call for a report (or one chunk of it): retrieves the
+    reference passages relevant to the text (beyond the core passages
+    already in the cached prefix). Shared by streamed and batch mining.
+
+    Returns:
+        keyword arguments for messages.create
+    """
+    passages = knowledge_index.retrieve(
+        context.kb_index, report_text, exclude=context.core_passages
+    )
+    kb_context = knowledge_index.format_passages(passages)
+    if passages:
+        print(f"   [{label}] -> Retrieved {len(passages)} reference passages "
+              f"(~{knowledge_index.estimate_tokens(kb_context)} tokens)")
+
+    return {
+        "model": MODEL,
+        "max_tokens": MINER_MAX_OUTPUT_TOKENS,
+        "temperature": 0,
+        "system": context.system,
+        "messages": [{"role": "user", "content": build_report_prompt(report_text, kb_context)}],
+    }
+
+
+def estimate_request_tokens(request):
+    """Estimated prompt tokens of a messages request (system prompt and messages)."""
+    text = "".join(block["text"] for block in request["system"])
+    text += "".join(message["content"] for message in request["messages"])
+    return knowledge_index.estimate_tokens(text)
+
 
-    print("   -> Sending to Claude AI (this may take 30s)...")
+def build_requests(report_text, context, label="report", metrics=None):
+    """
+    Build the messages call(s) for a chunk within MINER_MAX_PROMPT_TOKENS. A
+    prompt estimated over budget (the chunk's reference passages can push it
+    over) is split again at page, heading or line boundaries, and each part
+    built, and checked, on its own.
+
+    Returns:
+        list of (label, request, estimated prompt tokens), in text order;
+        empty if the prompt can't be brought under budget (counted, with its
+        estimate, in `metrics`)
+    """
+    request = build_request(report_text, context, label)
+    estimated = estimate_request_tokens(request)
+    if estimated <= MINER_MAX_PROMPT_TOKENS:
+        return [(label, request, estimated)]
+
+    text_budget = knowledge_index.estimate_tokens(report_text) - (estimated - MINER_MAX_PROMPT_TOKENS)
+    if text_budget < MIN_SPLIT_TOKENS:
+        if metrics is not None:
+            metrics.over_budget += 1
+            metrics.estimated_prompt_tokens += estimated
+        print(f"   [{label}] [Error] Prompt of ~{estimated} tokens is over the budget "
+              f"({MINER_MAX_PROMPT_TOKENS}) and can't be split further")
+        return []
+    parts = report_chunks.chunk_report(report_text, token_budget=text_budget)
+    print(f"   [{label}] -> Prompt of ~{estimated} tokens is over the budget "
+          f"({MINER_MAX_PROMPT_TOKENS}); split into {len(parts)} parts")
+    built = []
+    for idx, part in enumerate(parts):
+        part_requests = build_requests(part, context, f"{label} part {idx + 1}", metrics)
+        if not part_requests:
+            return []
+        built.extend(part_requests)
+    return built
 
+
+def analyze_with_claude(report_text, context, label="report", metrics=None):
+    """
+    Sends text (a report, or one chunk of it) to Claude to extract and clean
+    phrases. A prompt over MINER_MAX_PROMPT_TOKENS is split first (see
+    build_requests) and the parts' phrases merged. Timings, token counts and
+    stop reasons are added to `metrics` (run_log.CallMetrics).
+
+    Returns:
+        list of phrase dictionaries, or None if the call or its output failed
+
+    Raises:
+        response_cache.CacheMiss: in cache-only mode, if a request isn't cached
+    """
+    metrics = metrics or run_log.CallMetrics()
+    start = time.time()
     try:
-        client = anthropic.Anthropic(api_key=API_KEY)
-        message = client.messages.create(
-            model=MODEL,
-            max_tokens=4000,
-            temperature=0,
-            system="You are a JSON-only output machine. Return only valid JSON arrays.",
-            messages=[{"role": "user", "content": prompt}]
-        )
+        requests = build_requests(report_text, context, label, metrics)
+        if not requests:
+            return None
+        results = []
+        for part_label, request, estimated in requests:
+            metrics.requests += 1
+            metrics.estimated_prompt_tokens += estimated
+            phrases = _mine_request(request, context, part_label, metrics)
+            if phrases is None:
+                return None
+            results.append(phrases)
+        return results[0] if len(results) == 1 else merge_chunk_results(results)
+    finally:
+        metrics.seconds += time.time() - start
 
-        # Extract the response text
-        response_text = message.content[0].text
 
-        # Try to parse JSON
-        try:
-            result = json.loads(response_text)
-            if isinstance(result, list):
-                return result
+def _mine_request(request, context, label, metrics):
+    """
+    Stream one request's response, continuing output cut off by max_tokens.
+    A complete response is stored in the response cache under the initial
+    request, and an identical request later is answered from it.
+    """
+    cache_key = response_cache.request_key(request)
+    if RESPONSE_CACHE or context.cache_only:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            print(f"   [{label}] -> Using cached response")
+            context.record_cached_response()
+            metrics.cached_responses += 1
+            parser = json_stream.JsonArrayParser()
+            parser.feed(cached)
+            return _parsed_phrases(parser, label, metrics)
+        if context.cache_only:
+            raise response_cache.CacheMiss(label)
+
+    print(f"   [{label}] -> Sending to Claude AI (this may take 30s)...")
+
+    warming = context.wait_for_cache()
+    parser = json_stream.JsonArrayParser()
+    try:
+        for continuation in range(MINER_MAX_CONTINUATIONS + 1):
+            message = stream_message_with_backoff(context.client, label, parser, **request)
+            if message is not None:
+                context.usage.record(message.usage)
+                metrics.record_usage(message)
             else:
-                print(f"   [Error] AI returned JSON but not an array: {type(result)}")
-                return []
-        except json.JSONDecodeError as e:
-            print(f"   [Error] AI output was not valid JSON: {e}")
-            print(f"   Raw output (first 200 chars): {response_text[:200]}")
-            return []
+                metrics.stop_reasons["interrupted"] += 1
+            if parser.complete or not parser.started:
+                break
+            if continuation == MINER_MAX_CONTINUATIONS:
+                print(f"   [{label}] [Warning] Output still incomplete; keeping "
+                      f"{len(parser.objects)} phrases")
+                break
+
+            # Output was cut off: keep the complete phrases and have the model
+            # continue from the last of them, rather than re-mining the text
+            reason = getattr(message, "stop_reason", None) or "interrupted"
+            print(f"   [{label}] -> Output stopped after {len(parser.objects)} phrases "
+                  f"({reason}), requesting the rest...")
+            parser.rewind()
+            request["messages"] = [
+                request["messages"][0],
+                {"role": "assistant", "content": parser.text},
+            ]
 
     except anthropic.APIError as e:
-        print(f"   [Error] API Error: {e}")
-        return []
+        print(f"   [{label}] [Error] API Error: {e}")
+        return None
 
+    except httpx.TransportError as e:
+        # Connection errors that outlasted the retries
+        print(f"   [{label}] [Error] Connection error: {e.__class__.__name__}: {e}")
+        return None
 
-def save_to_excel(data, report_filename):
-    """Append extracted phrases to the Master Excel sheet."""
-    if not data:
-        print("   No phrases to save.")
-        return
+    finally:
+        if warming:
+            context.cache_ready()
 
-    df_new = pd.DataFrame(data)
+    if RESPONSE_CACHE and parser.complete:
+        response_cache.put(cache_key, parser.text, MODEL)
+    return _parsed_phrases(parser, label, metrics)
 
-    # Ensure all columns exist
-    for col in DB_COLUMNS:
-        if col not in df_new.columns:
-            df_new[col] = ""
 
-    # Reorder columns
-    df_new = df_new[DB_COLUMNS]
+def _parsed_phrases(parser, label, metrics):
+    """The phrases from a finished response, or None if it wasn't a JSON array."""
+    if not parser.started:
+        metrics.unparsed += 1
+        print(f"   [{label}] [Error] AI output was not a JSON array")
+        print(f"   [{label}] Raw output (first 200 chars): {parser.text[:200]}")
+        return None
+    if parser.errors:
+        metrics.malformed_phrases += parser.errors
+        print(f"   [{label}] [Warning] Skipped {parser.errors} malformed phrase(s)")
+    return parser.objects
 
-    # Append to Master Excel
+
+def create_client():
+    """
+    Create the API client shared by all worker threads. Retries are handled by
+    stream_message_with_backoff, so the SDK's own retries are disabled.
+    """
+    return anthropic.Anthropic(api_key=API_KEY, max_retries=0)
+
+
+def manifest_entry(job, status, phrase_count=0, error="", batch_id="", batch_keys=()):
+    """
+    Build a mining manifest entry for a report job. A batched report also
+    records the response-cache key of each of its requests, in order.
+    """
+    return {
+        "file_hash": job["file_hash"],
+        "file_name": job["filename"],
+        "status": status,
+        "phrase_count": phrase_count,
+        "mined_at": datetime.now().isoformat(timespec="seconds"),
+        "model": MODEL,
+        "error": error,
+        "batch_id": batch_id,
+        "batch_keys": json.dumps(list(batch_keys)) if batch_keys else "",
+    }
+
+
+def plan_reports(pdf_files, force_patterns=()):
+    """
+    Decide which reports to mine using the manifest.
+
+    Reports whose content hash is already recorded as "done", or as
+    "batched" (submitted in a batch that --batch will collect), are skipped,
+    unless their filename matches one of `force_patterns` (shell-style, e.g.
+    "2019_*.pdf"). Reports whose filename is in the manifest (mined before,
+    then forced or edited since) replace that file's existing phrases instead of duplicating them.
+
+    Returns:
+        (jobs, skipped, awaiting) - list of job dicts, the number of reports
+        already mined and the number waiting on a batch
+    """
+    conn = phrase_store.connect()
     try:
-        with pd.ExcelWriter(OUTPUT_FILE, engine='openpyxl', mode='a', if_sheet_exists='overlay') as writer:
-            # Check if Master sheet exists
+        manifest = phrase_store.load_manifest(conn)
+    finally:
+        conn.close()
+    # Any earlier entry counts: a failed re-mine overwrites the file's "done"
+    # entry, but its phrases are still in the store
+    mined_names = {e["file_name"] for e in manifest.values()}
+
+    jobs = []
+    skipped = 0
+    awaiting = 0
+    for filename in pdf_files:
+        file_hash = text_cache.file_sha256(os.path.join(REPORTS_DIR, filename))
+        forced = any(fnmatch.fnmatch(filename, pattern) for pattern in force_patterns)
+        entry = manifest.get(file_hash)
+        if entry and entry["status"] == "done" and not forced:
+            skipped += 1
+            continue
+        if entry and entry["status"] == "batched" and not forced:
+            awaiting += 1
+            continue
+        jobs.append({
+            "filename": filename,
+            "file_hash": file_hash,
+            "replace": filename in mined_names,
+        })
+    return jobs, skipped, awaiting
+
+
+def save_to_journal(phrases, job):
+    """
+    Append a report's phrases and its manifest entry to the store journal.
+    The cost is per report, not per library size; the journal is applied
+    to the store at the end of the run (phrase_journal.compact).
+    """
+    phrase_journal.append(
+        phrases,
+        reports=[manifest_entry(job, "done", len(phrases))],
+        replace_sources=[job["filename"]] if job["replace"] else (),
+    )
+    print(f"   [{job['filename']}] ✓ Journaled {len(phrases)} phrases")
+    return len(phrases)
+
+
+def record_failure(job, error):
+    """Mark a report as failed in the manifest so the next run retries it."""
+    phrase_journal.append([], reports=[manifest_entry(job, "failed", error=error)])
+
+
+def merge_chunk_results(chunk_results):
+    """
+    Reduce step: concatenate the phrases from each chunk of a report, in
+    report order, dropping repeats (same wording up to case and punctuation,
+    e.g. a defect restated in the summary). Near-duplicates are merged again
+    against the whole library when the phrases are stored.
+    """
+    merged = []
+    seen = set()
+    for phrases in chunk_results:
+        for phrase in phrases:
+            if not isinstance(phrase, dict):
+                continue
+            key = phrase_dedup.normalize(phrase.get("Content", ""))
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(phrase)
+    return merged
+
+
+def mine_reports(jobs, context, log, concurrency=MINER_CONCURRENCY):
+    """
+    Run the mining pipeline over the given report jobs (see plan_reports),
+    recording each finished report in `log` (run_log.RunLog).
+
+    Stages:
+      1. PDF text extraction (MINER_EXTRACT_WORKERS processes)
+      2. Model calls (`concurrency` threads, with backoff), one per chunk of
+         MINER_CHUNK_TOKENS (see report_chunks.py)
+      3. This thread, which merges each report's chunk results once they are
+         all in and appends the report to the journal
+
+    At most 2 x concurrency reports are in flight, so extracted text for a
+    large folder is never all held in memory at once. A report is only saved
+    when every chunk succeeded; otherwise it is marked failed and retried on
+    the next run. If the run is interrupted, phrases from reports that
+    already finished are in the journal and are applied on the next
+    compaction.
+
+    Returns:
+        Number of phrases journaled
+    """
+    total_saved = 0
+    queued = iter(jobs)
+    max_in_flight = max(2 * concurrency, 1)
+    pending = {}
+    extracting = 0
+    chunk_results = {}   # file_hash -> per-chunk phrases (None: pending, False: failed)
+    chunk_metrics = {}   # file_hash -> per-chunk run_log.CallMetrics
+    report_info = {}     # file_hash -> extraction figures for the run log
+    not_cached = set()   # --cache-only: file_hash of reports with an uncached chunk
+
+    with ProcessPoolExecutor(max_workers=MINER_EXTRACT_WORKERS) as extract_pool, \
+            ThreadPoolExecutor(max_workers=concurrency) as api_pool:
+
+        def submit_extractions():
+            nonlocal extracting
+            while extracting + len(chunk_results) < max_in_flight:
+                job = next(queued, None)
+                if job is None:
+                    return
+                print(f"Mining: {job['filename']}")
+                pdf_path = os.path.join(REPORTS_DIR, job["filename"])
+                future = extract_pool.submit(prepare_report, pdf_path, job["file_hash"])
+                pending[future] = ("extract", job, None)
+                extracting += 1
+
+        submit_extractions()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, job, chunk_idx = pending.pop(future)
+                filename = job["filename"]
+
+                if stage == "extract":
+                    # 1 -> 2: hand each chunk of the extracted text to a model worker
+                    extracting -= 1
+                    try:
+                        full_text, extraction, cache_hit, hits = future.result()
+                    except Exception as e:
+                        # A crashed worker costs this report only, not the run
+                        print(f"   [{filename}] [Error] Extraction failed: {e.__class__.__name__}: {e}")
+                        record_failure(job, f"extraction failed: {e}")
+                        log.report(job, "failed", error=f"extraction failed: {e}")
+                        continue
+                    info = {
+                        "extract_seconds": round(extraction.seconds, 2),
+                        "text_cache_hit": cache_hit,
+                        "pages": len(extraction.pages),
+                        "characters": len(full_text),
+                    }
+                    if extraction.error:
+                        print(f"   [{filename}] [Error] Could not extract from PDF: {extraction.error}")
+                    if not full_text:
+                        print(f"   [{filename}] [Error] Could not extract text from PDF")
+                        error = extraction.error or "no text extracted"
+                        record_failure(job, error)
+                        log.report(job, "failed", error=error, **info)
+                        continue
+                    if cache_hit:
+                        print(f"   [{filename}] -> Loaded {len(full_text)} characters from "
+                              f"{len(extraction.pages)} pages (text cache)")
+                    else:
+                        pages_per_second = len(extraction.pages) / max(extraction.seconds, 1e-6)
+                        print(f"   [{filename}] -> Extracted {len(full_text)} characters from "
+                              f"{len(extraction.pages)} pages ({pages_per_second:.1f} pages/s)")
+                    if extraction.failed_pages:
+                        print(f"   [{filename}] [Warning] {extraction.failed_pages} page(s) "
+                              f"failed or timed out")
+                    if hits:
+                        context.redactions.update(hits)
+                        print(f"   [{filename}] -> Anonymized {anonymize.format_hits(hits)}")
+                    chunks = report_chunks.chunk_report(full_text)
+                    if len(chunks) > 1:
+                        print(f"   [{filename}] -> Split into {len(chunks)} chunks")
+                    info["chunks"] = len(chunks)
+                    report_info[job["file_hash"]] = info
+                    chunk_results[job["file_hash"]] = [None] * len(chunks)
+                    chunk_metrics[job["file_hash"]] = [run_log.CallMetrics() for _ in chunks]
+                    for idx, chunk in enumerate(chunks):
+                        label = filename if len(chunks) == 1 else f"{filename} {idx + 1}/{len(chunks)}"
+                        api_future = api_pool.submit(analyze_with_claude, chunk, context, label,
+                                                     chunk_metrics[job["file_hash"]][idx])
+                        pending[api_future] = ("analyze", job, idx)
+
+                else:
+                    # 2 -> 3: once every chunk is in, merge, tag and journal the phrases
+                    results = chunk_results[job["file_hash"]]
+                    try:
+                        phrases = future.result()
+                    except response_cache.CacheMiss:
+                        not_cached.add(job["file_hash"])
+                        phrases = None
+                    except Exception as e:
+                        # An unexpected error fails this chunk (and report) only
+                        print(f"   [{filename}] [Error] Chunk {chunk_idx + 1} failed: "
+                              f"{e.__class__.__name__}: {e}")
+                        phrases = None
+                    results[chunk_idx] = False if phrases is None else phrases
+                    if any(result is None for result in results):
+                        continue
+                    del chunk_results[job["file_hash"]]
+                    info = report_info.pop(job["file_hash"])
+                    metrics = run_log.CallMetrics.combine(chunk_metrics.pop(job["file_hash"]))
+
+                    if job["file_hash"] in not_cached:
+                        # Left as it is in the manifest: not a mining failure
+                        not_cached.discard(job["file_hash"])
+                        print(f"   [{filename}] -> Not in the response cache; skipped")
+                        log.report(job, "skipped", metrics, error="not in response cache", **info)
+                        continue
+
+                    failed = sum(1 for result in results if result is False)
+                    if failed:
+                        print(f"   [{filename}] [Error] {failed} of {len(results)} chunk(s) failed")
+                        error = f"{failed} of {len(results)} chunks failed"
+                        record_failure(job, error)
+                        log.report(job, "failed", metrics, error=error, **info)
+                        continue
+                    extracted_phrases = merge_chunk_results(results)
+                    if not extracted_phrases:
+                        print(f"   [{filename}] [Warning] No phrases extracted")
+                        record_failure(job, "no phrases extracted")
+                        log.report(job, "failed", metrics, error="no phrases extracted", **info)
+                        continue
+                    print(f"   [{filename}] -> AI extracted {len(extracted_phrases)} phrases")
+                    for phrase in extracted_phrases:
+                        phrase['Source_File'] = filename
+                    rows = save_to_journal(extracted_phrases, job)
+                    total_saved += rows
+                    log.report(job, "saved", metrics, rows_journaled=rows, **info)
+
+            submit_extractions()
+
+    return total_saved
+
+
+# custom_id is limited to 64 characters: a prefix of the report's hash plus
+# the chunk number identifies each request
+BATCH_HASH_CHARS = 48
+
+
+def batch_custom_id(file_hash, chunk_idx):
+    return f"{file_hash[:BATCH_HASH_CHARS]}-{chunk_idx}"
+
+
+def submit_batches(jobs, context, log):
+    """
+    Extract, anonymize and chunk every report, and submit the requests as
+    Message Batches (at most MINER_BATCH_MAX_REQUESTS each; a report's
+    chunks always share a batch). Each report is journaled as "batched" with
+    its batch ID, so collect_batches can pick up the results in this run or
+    a later one. Prompts over MINER_MAX_PROMPT_TOKENS are split as in
+    streamed mining, each part a request of its own.
+
+    Returns:
+        Number of reports submitted
+    """
+    requests = []
+    batch_jobs = []   # (job, response-cache key of each of its requests)
+    submitted = 0
+
+    def submit():
+        nonlocal submitted
+        batch = call_with_backoff("batch", context.client.messages.batches.create, requests=requests)
+        phrase_journal.append(
+            [], reports=[manifest_entry(job, "batched", batch_id=batch.id, batch_keys=keys)
+                         for job, keys in batch_jobs]
+        )
+        print(f"✓ Submitted batch {batch.id}: {len(requests)} request(s) "
+              f"for {len(batch_jobs)} report(s)")
+        submitted += len(batch_jobs)
+        requests.clear()
+        batch_jobs.clear()
+
+    with ProcessPoolExecutor(max_workers=MINER_EXTRACT_WORKERS) as extract_pool:
+        futures = [
+            extract_pool.submit(prepare_report, os.path.join(REPORTS_DIR, job["filename"]),
+                                job["file_hash"])
+            for job in jobs
+        ]
+        for job, future in zip(jobs, futures):
+            filename = job["filename"]
             try:
-                ws = writer.sheets['Master']
-                start_row = ws.max_row
-            except KeyError:
-                print(f"   [Error] Master sheet not found in {OUTPUT_FILE}")
-                return
-
-            # Write without headers (append to existing data)
-            df_new.to_excel(
-                writer,
-                sheet_name='Master',
-                index=False,
-                header=False,
-                startrow=start_row
+                full_text, extraction, cache_hit, hits = future.result()
+            except Exception as e:
+                # A crashed worker costs this report only, not the batch
+                print(f"   [{filename}] [Error] Extraction failed: {e.__class__.__name__}: {e}")
+                record_failure(job, f"extraction failed: {e}")
+                log.report(job, "failed", error=f"extraction failed: {e}")
+                continue
+            info = {
+                "extract_seconds": round(extraction.seconds, 2),
+                "text_cache_hit": cache_hit,
+                "pages": len(extraction.pages),
+                "characters": len(full_text),
+            }
+            if not full_text:
+                print(f"   [{filename}] [Error] Could not extract text from PDF")
+                error = extraction.error or "no text extracted"
+                record_failure(job, error)
+                log.report(job, "failed", error=error, **info)
+                continue
+            if hits:
+                context.redactions.update(hits)
+            chunks = report_chunks.chunk_report(full_text)
+            metrics = run_log.CallMetrics()
+            built = []
+            for idx, chunk in enumerate(chunks):
+                label = filename if len(chunks) == 1 else f"{filename} {idx + 1}/{len(chunks)}"
+                chunk_requests = build_requests(chunk, context, label, metrics)
+                if not chunk_requests:
+                    break
+                built.extend(chunk_requests)
+            if metrics.over_budget:
+                record_failure(job, "prompt over token budget")
+                log.report(job, "failed", metrics, error="prompt over token budget",
+                           chunks=len(chunks), **info)
+                continue
+            if requests and len(requests) + len(built) > MINER_BATCH_MAX_REQUESTS:
+                submit()
+            for idx, (label, request, estimated) in enumerate(built):
+                metrics.requests += 1
+                metrics.estimated_prompt_tokens += estimated
+                requests.append({
+                    "custom_id": batch_custom_id(job["file_hash"], idx),
+                    "params": request,
+                })
+            batch_jobs.append((job, [response_cache.request_key(request) for _, request, _ in built]))
+            print(f"   [{filename}] -> {len(built)} request(s) queued")
+            log.report(job, "batched", metrics, chunks=len(chunks), **info)
+    if requests:
+        submit()
+    return submitted
+
+
+def wait_for_batch(context, batch_id, poll_seconds=MINER_BATCH_POLL_SECONDS):
+    """Poll a batch until it has ended; returns the batch."""
+    while True:
+        batch = call_with_backoff(batch_id, context.client.messages.batches.retrieve, batch_id)
+        counts = batch.request_counts
+        if batch.processing_status == "ended":
+            print(f"✓ Batch {batch_id} ended: {counts.succeeded} succeeded, "
+                  f"{counts.errored} errored, {counts.expired} expired, {counts.canceled} canceled")
+            return batch
+        print(f"   Batch {batch_id}: {counts.processing} request(s) processing, "
+              f"{counts.succeeded} done; checking again in {poll_seconds}s...")
+        time.sleep(poll_seconds)
+
+
+def parse_batch_result(item, context, label, metrics, cache_key=None):
+    """
+    Phrases from one batch result, or None if the request failed. Output cut
+    off by max_tokens keeps its complete phrases (there is no follow-up call
+    in batch mode). A complete response is stored in the response cache
+    under `cache_key`, so --cache-only can replay it.
+    """
+    result = item.result
+    if result.type != "succeeded":
+        print(f"   [{label}] [Error] Batch request {result.type}")
+        metrics.stop_reasons[result.type] += 1
+        return None
+    message = result.message
+    context.usage.record(message.usage)
+    metrics.record_usage(message)
+
+    parser = json_stream.JsonArrayParser()
+    for block in message.content:
+        if block.type == "text":
+            parser.feed(block.text)
+    if parser.started and not parser.complete:
+        print(f"   [{label}] [Warning] Output cut off ({message.stop_reason}); keeping "
+              f"{len(parser.objects)} phrases")
+    if RESPONSE_CACHE and cache_key and parser.complete:
+        response_cache.put(cache_key, parser.text, MODEL)
+    return _parsed_phrases(parser, label, metrics)
+
+
+def collect_batches(context, log, poll_seconds=MINER_BATCH_POLL_SECONDS):
+    """
+    Wait for every batch recorded in the manifest to end, then save its
+    results through the same path as streamed mining. A report with a
+    failed, expired or missing chunk is marked failed, so the next run mines
+    it again. Each collected report is recorded in `log`.
+
+    Returns:
+        Number of phrases journaled
+    """
+    conn = phrase_store.connect()
+    try:
+        manifest = phrase_store.load_manifest(conn)
+    finally:
+        conn.close()
+    waiting = {}
+    for entry in manifest.values():
+        if entry["status"] == "batched":
+            waiting.setdefault(entry["batch_id"], []).append(entry)
+
+    total_saved = 0
+    for batch_id, entries in waiting.items():
+        print(f"\nCollecting batch {batch_id} ({len(entries)} report(s))")
+        wait_for_batch(context, batch_id, poll_seconds)
+
+        names = {entry["file_hash"][:BATCH_HASH_CHARS]: entry["file_name"] for entry in entries}
+        cache_keys = {
+            entry["file_hash"][:BATCH_HASH_CHARS]: json.loads(entry["batch_keys"] or "[]")
+            for entry in entries
+        }
+        results = {}   # hash prefix -> {chunk index: phrases, or None if failed}
+        metrics = {}   # hash prefix -> run_log.CallMetrics
+        for item in call_with_backoff(batch_id, context.client.messages.batches.results, batch_id):
+            prefix, _, idx = item.custom_id.rpartition("-")
+            if prefix not in names:
+                continue  # Report since re-submitted in another batch
+            idx = int(idx)
+            label = f"{names[prefix]} {idx + 1}"
+            report_metrics = metrics.setdefault(prefix, run_log.CallMetrics())
+            keys = cache_keys[prefix]
+            results.setdefault(prefix, {})[idx] = parse_batch_result(
+                item, context, label, report_metrics, keys[idx] if idx < len(keys) else None
             )
-            print(f"   ✓ Saved {len(df_new)} phrases to Master Database")
 
-    except Exception as e:
-        print(f"   [Error] Could not save to Excel: {e}")
+        for entry in entries:
+            # The batch holds the whole report, so it replaces any phrases
+            # already stored for the file
+            job = {"filename": entry["file_name"], "file_hash": entry["file_hash"], "replace": True}
+            filename = job["filename"]
+            prefix = entry["file_hash"][:BATCH_HASH_CHARS]
+            chunks = results.get(prefix, {})
+            report_metrics = metrics.get(prefix, run_log.CallMetrics())
+            # One cache key was recorded per request at submission; entries
+            # from before that only show gaps in the indices received
+            expected = len(cache_keys[prefix]) or len(chunks)
+            report_metrics.requests = expected
+            info = {"batch_id": batch_id}
+            if sorted(chunks) != list(range(expected)) or not chunks:
+                print(f"   [{filename}] [Error] Results missing from batch")
+                error = f"results missing from batch {batch_id}"
+                record_failure(job, error)
+                log.report(job, "failed", report_metrics, error=error, **info)
+                continue
+            failed = sum(1 for phrases in chunks.values() if phrases is None)
+            if failed:
+                print(f"   [{filename}] [Error] {failed} of {len(chunks)} chunk(s) failed")
+                error = f"{failed} of {len(chunks)} chunks failed in batch {batch_id}"
+                record_failure(job, error)
+                log.report(job, "failed", report_metrics, error=error, **info)
+                continue
+            extracted_phrases = merge_chunk_results(chunks[idx] for idx in sorted(chunks))
+            if not extracted_phrases:
+                print(f"   [{filename}] [Warning] No phrases extracted")
+                record_failure(job, "no phrases extracted")
+                log.report(job, "failed", report_metrics, error="no phrases extracted", **info)
+                continue
+            print(f"   [{filename}] -> AI extracted {len(extracted_phrases)} phrases")
+            for phrase in extracted_phrases:
+                phrase['Source_File'] = filename
+            rows = save_to_journal(extracted_phrases, job)
+            total_saved += rows
+            log.report(job, "saved", report_metrics, rows_journaled=rows, **info)
+    return total_saved
+
+
+def mine_in_batches(jobs, context, log, wait=True):
+    """
+    Batch mode: submit the pending reports as Message Batches, then (with
+    `wait`) collect every outstanding batch, including ones submitted by
+    earlier runs.
+
+    Returns:
+        Number of phrases journaled
+    """
+    if jobs:
+        submit_batches(jobs, context, log)
+        # Record the batch IDs in the manifest before waiting, so an
+        # interrupted run can resume collecting them
+        phrase_journal.compact()
+    if not wait:
+        print("\nNot waiting for results; run with --batch again to collect them.")
+        return 0
+    return collect_batches(context, log)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mine PDF survey reports into the phrase library.")
+    parser.add_argument(
+        "--concurrency", type=int, default=MINER_CONCURRENCY,
+        help=f"Parallel model calls (default: {MINER_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--force", action="append", default=[], metavar="PATTERN",
+        help='Re-mine reports matching a filename pattern even if already mined '
+             '(e.g. --force "2019_*.pdf"; use --force "*" for all). Repeatable.'
+    )
+    parser.add_argument(
+        "--batch", action="store_true",
+        help="Submit pending reports as Message Batches (cheaper, results within "
+             "24h), then wait for and save every outstanding batch"
+    )
+    parser.add_argument(
+        "--no-wait", action="store_true",
+        help="With --batch: submit and exit; a later --batch run collects the results"
+    )
+    parser.add_argument(
+        "--cache-only", action="store_true",
+        help="Replay responses from the response cache without calling the API "
+             "(no API key needed); reports with an uncached chunk are skipped. "
+             'Combine with --force "*" to re-ingest reports already mined.'
+    )
+    args = parser.parse_args()
+    if args.cache_only and args.batch:
+        parser.error("--cache-only cannot be combined with --batch")
+    return args
 
 
 def main():
     """Main execution function."""
+    args = parse_args()
+
     print("=" * 70)
     print("PHRASE LIBRARY ENGINE - AI REPORT MINER")
     print("=" * 70)
 
     # Check API Key
-    if not API_KEY:
+    if not API_KEY and not args.cache_only:
         print("\n[ERROR] No API Key found!")
         print("\nSetup Instructions:")
         print("1. Get your API key from: https://console.anthropic.com/")
@@ -238,40 +1173,67 @@ def main():
         print(f"Please add PDF reports to this folder and run again.")
         return
 
-    print(f"\nFound {len(pdf_files)} report(s) to mine:\n")
+    # Apply phrases journaled by an interrupted run, so the manifest is complete
+    recovered = phrase_journal.compact()
+    if recovered["entries"]:
+        print(f"\n✓ Applied {recovered['entries']} journal entries left by a previous run")
 
-    # Process each report
-    for filename in pdf_files:
-        print(f"Mining: {filename}")
-
-        pdf_path = os.path.join(REPORTS_DIR, filename)
-
-        # 1. Extract Text
-        print("   -> Extracting text from PDF...")
-        full_text = extract_text_from_pdf(pdf_path)
-
-        if not full_text:
-            print("   [Error] Could not extract text from PDF")
-            continue
-
-        print(f"   -> Extracted {len(full_text)} characters")
+    jobs, skipped, awaiting = plan_reports(pdf_files, args.force)
+    if args.batch:
+        mode = "batch mode"
+        log = run_log.RunLog("batch")
+    elif args.cache_only:
+        mode = "cache only"
+        log = run_log.RunLog("cache-only")
+    else:
+        mode = f"concurrency: {args.concurrency}"
+        log = run_log.RunLog("stream")
+    print(f"\nFound {len(pdf_files)} report(s); {skipped} already mined (see manifest), "
+          f"{awaiting} awaiting a batch, {len(jobs)} to mine ({mode}):\n")
 
-        # 2. Analyze with AI
-        extracted_phrases = analyze_with_claude(full_text, kb)
-
-        if not extracted_phrases:
-            print(f"   [Warning] No phrases extracted")
-            continue
-
-        print(f"   -> AI extracted {len(extracted_phrases)} phrases")
+    if not jobs and not (args.batch and awaiting):
+        if awaiting:
+            print("Run with --batch to collect the reports submitted in batches.")
+        print("Nothing to do. Use --force PATTERN to re-mine specific reports.")
+        return
 
-        # 3. Add Source File tag
-        for phrase in extracted_phrases:
-            phrase['Source_File'] = filename
+    context = MiningContext(kb, cache_only=args.cache_only)
+    if context.core_passages:
+        print(f"Cached prompt prefix includes {len(context.core_passages)} core reference passages\n")
 
-        # 4. Save to Excel
-        save_to_excel(extracted_phrases, filename)
-        print()
+    start = time.time()
+    try:
+        if args.batch:
+            total_saved = mine_in_batches(jobs, context, log, wait=not args.no_wait)
+        else:
+            total_saved = mine_reports(jobs, context, log, concurrency=args.concurrency)
+    finally:
+        # Apply the run's journal in one transaction (and refresh the Excel
+        # export once), even if the run was interrupted
+        print("\nApplying journal to the phrase store...")
+        totals = phrase_journal.compact()
+        print(f"✓ Saved {totals['inserted']} phrases to Master Database "
+              f"({totals['merged']} near-duplicates merged)")
+        if totals["rejected"]:
+            print(f"  {totals['rejected']} phrases rejected by validation (see {REJECTION_REPORT_FILE})")
+        log.finish(inserted=totals["inserted"], merged=totals["merged"],
+                   rejected=totals["rejected"])
+    elapsed = time.time() - start
+    if args.batch:
+        print(f"\n✓ Submitted {len(jobs)} report(s) in batches, collected {total_saved} "
+              f"phrases in {elapsed:.1f}s")
+    else:
+        print(f"\n✓ Mined {len(jobs)} report(s), extracted {total_saved} phrases in {elapsed:.1f}s")
+    context.usage.report()
+    if context.cached_responses:
+        print(f"Responses from cache: {context.cached_responses}")
+    if context.redactions:
+        print(f"Anonymized before sending: {anonymize.format_hits(context.redactions)}")
+    print(f"\nReports this run (details in {log.path}, run {log.run_id}):\n")
+    run_log.print_summary(log.records)
+    text_cache.prune()
+    response_cache.prune()
+    print()
 
     print("=" * 70)
     print("✓ AI Report Mining Complete")
@@ -6,9 +6,21 @@ Run: streamlit run 5_dashboard.py
 """
 
 import streamlit as st
-import pandas as pd
+import io
 import os
-from config import OUTPUT_FILE, STANDARD_COLUMNS
+import numpy as np
+from config import (
+    OUTPUT_FILE,
+    STORE_DB_FILE,
+    STANDARD_COLUMNS,
+    FACET_COLUMNS,
+    DASHBOARD_PAGE_SIZES,
+    DASHBOARD_DEFAULT_PAGE_SIZE,
+    DASHBOARD_MAX_RENDER_ROWS,
+)
+import phrase_store
+import phrase_facets
+import excel_export
 
 # Page Configuration
 st.set_page_config(
@@ -52,22 +64,55 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 
+# Sidebar filter labels and help text, for the columns in FACET_COLUMNS
+FACET_LABELS = {
+    "Section": ("📋 Section", "Filter by survey section"),
+    "Element": ("🏠 Element", "Filter by building element"),
+    "Property_Age": ("📅 Property Age", "Filter by property age band"),
+    "Property_Style": ("🏘️  Property Style", "Filter by property style"),
+}
+
+
+@st.cache_resource(max_entries=1, show_spinner="Loading phrase library...")
+def _load_phrases(signature):
+    """
+    Parse the phrase table once per store version. Cached across reruns and
+    sessions; `signature` changes whenever the importer or miner writes, which
+    invalidates the cache. The frame is shared, so callers must not mutate it.
+    """
+    return phrase_store.load_frame_snapshot()
+
+
+@st.cache_resource(max_entries=1, show_spinner="Indexing filters...")
+def _load_facets(signature):
+    """Facet index for the sidebar, built once per store version."""
+    return phrase_facets.FacetIndex(_load_phrases(signature))
+
+
 def load_data():
-    """Load the Master Sheet from Excel database."""
-    if not os.path.exists(OUTPUT_FILE):
+    """
+    Load all phrases from the phrase store and their facet index
+    (cached until the store changes). Returns (df, facets) or None.
+    """
+    if not os.path.exists(STORE_DB_FILE):
         return None
     try:
-        # Load the 'Master' sheet which contains all aggregated phrases
-        df = pd.read_excel(OUTPUT_FILE, sheet_name='Master')
-        # Ensure consistent string types for searching and fill NaNs
-        df = df.fillna("")
-        df = df.astype(str)
-        return df
+        signature = phrase_store.store_signature()
+        return _load_phrases(signature), _load_facets(signature)
     except Exception as e:
         st.error(f"Error loading database: {e}")
         return None
 
 
+def search_phrases(query):
+    """Return phrase ids matching the query, ranked by BM25 via the store's FTS5 index."""
+    conn = phrase_store.connect()
+    try:
+        return phrase_store.search_phrases(conn, query)
+    finally:
+        conn.close()
+
+
 def format_display_columns(df):
     """Reorder columns for better display."""
     display_order = [
@@ -85,6 +130,55 @@ def format_display_columns(df):
     return df[display_cols]
 
 
+def select_page(total_rows, filter_state):
+    """
+    Page controls for the results table. Returns (start, stop) row positions.
+    The page resets to 1 whenever the search or filters change.
+    """
+    page_sizes = [size for size in DASHBOARD_PAGE_SIZES if size <= DASHBOARD_MAX_RENDER_ROWS]
+    if st.session_state.get("filter_state") != filter_state:
+        st.session_state["filter_state"] = filter_state
+        st.session_state["page"] = 1
+
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        page_size = st.selectbox(
+            "Rows per page",
+            page_sizes,
+            index=page_sizes.index(DASHBOARD_DEFAULT_PAGE_SIZE)
+            if DASHBOARD_DEFAULT_PAGE_SIZE in page_sizes else 0,
+            key="page_size"
+        )
+    page_count = max((total_rows + page_size - 1) // page_size, 1)
+    st.session_state["page"] = min(st.session_state.get("page", 1), page_count)
+    with col2:
+        page = st.number_input("Page", min_value=1, max_value=page_count, step=1, key="page")
+
+    start = (page - 1) * page_size
+    stop = min(start + page_size, total_rows)
+    with col3:
+        st.caption(f"Showing {start + 1}-{stop} of {total_rows} (page {page} of {page_count})")
+    return start, stop
+
+
+def csv_export(df, positions):
+    """Deferred CSV download: built only when the button is clicked."""
+    return lambda: format_display_columns(df.iloc[positions]).to_csv(index=False)
+
+
+def excel_export_bytes(df, positions):
+    """Deferred Excel download: built only when the button is clicked."""
+    def build():
+        buffer = io.BytesIO()
+        excel_export.write_workbook(
+            df.iloc[positions].reindex(columns=STANDARD_COLUMNS).itertuples(index=False, name=None),
+            buffer,
+            sections=()
+        )
+        return buffer.getvalue()
+    return build
+
+
 def main():
     # Header
     st.title("🏗️ STRUCTURA | Intelligent Survey Engine")
@@ -92,11 +186,13 @@ def main():
     st.divider()
 
     # Load Data
-    df = load_data()
+    data = load_data()
 
-    if df is None:
-        st.error(f"❌ Database ({OUTPUT_FILE}) not found!")
+    if data is None:
+        st.error(f"❌ Database ({STORE_DB_FILE}) not found!")
         st.warning("Please run `python 1_setup_database.py` first to create the database.")
+        if os.path.exists(OUTPUT_FILE):
+            st.info(f"To migrate phrases from {OUTPUT_FILE}, run `python phrase_store.py import-excel`.")
         st.info("""
         Quick start:
         1. Run: `python 1_setup_database.py`
@@ -105,6 +201,8 @@ def main():
         """)
         return
 
+    df, facets = data
+
     # Create layout: Sidebar + Main
     with st.sidebar:
         st.header("🔍 Search & Filter")
@@ -113,7 +211,9 @@ def main():
         search_query = st.text_input(
             "🔎 Search Phrases",
             placeholder="e.g., 'Chimney lean', 'Roof defects', 'Damp'",
-            help="Search across all phrase content"
+            help='Search phrase content, elements and sub-sections. '
+                 'Words match by prefix ("chimn" finds "chimney"); '
+                 'use quotes for exact phrases ("rising damp").'
         )
 
         st.divider()
@@ -121,34 +221,35 @@ def main():
         # Filter Dropdowns
         st.subheader("Filters")
 
-        # Extract unique values and sort
-        sections = sorted([x for x in df['Section'].unique() if x and str(x).lower() != 'nan'])
-        selected_section = st.selectbox(
-            "📋 Section",
-            ["All"] + sections,
-            help="Filter by survey section"
-        )
-
-        elements = sorted([x for x in df['Element'].unique() if x and str(x).lower() != 'nan'])
-        selected_element = st.selectbox(
-            "🏠 Element",
-            ["All"] + elements,
-            help="Filter by building element"
-        )
-
-        ages = sorted([x for x in df['Property_Age'].unique() if x and str(x).lower() != 'nan'])
-        selected_age = st.selectbox(
-            "📅 Property Age",
-            ["All"] + ages,
-            help="Filter by property age band"
-        )
-
-        styles = sorted([x for x in df['Property_Style'].unique() if x and str(x).lower() != 'nan'])
-        selected_style = st.selectbox(
-            "🏘️  Property Style",
-            ["All"] + styles,
-            help="Filter by property style"
-        )
+        # Search first (ranked full-text search, best matches first), so the
+        # filter counts reflect it
+        search_mask = None
+        ranked_positions = None
+        if search_query:
+            ranked_positions = facets.search_positions(search_phrases(search_query))
+            search_mask = np.zeros(facets.row_count, dtype=bool)
+            search_mask[ranked_positions] = True
+
+        # Current selections (from the previous run) drive each filter's counts
+        selections = {}
+        for col in FACET_COLUMNS:
+            value = st.session_state.get(f"facet_{col}", "All")
+            selections[col] = None if value == "All" else value
+
+        for col in FACET_COLUMNS:
+            label, help_text = FACET_LABELS.get(col, (col.replace("_", " "), f"Filter by {col}"))
+            # Counts under the search and every *other* filter
+            counts = facets.counts(col, facets.filter_mask(selections, search_mask, skip=col))
+            options = [v for v in counts if v and str(v).lower() != 'nan']
+            if selections[col] is not None and selections[col] not in counts:
+                options.append(selections[col])
+            st.selectbox(
+                label,
+                ["All"] + options,
+                format_func=lambda v, c=counts: v if v == "All" else f"{v} ({c.get(v, 0)})",
+                help=help_text,
+                key=f"facet_{col}"
+            )
 
         st.divider()
 
@@ -156,46 +257,30 @@ def main():
         st.subheader("📊 Statistics")
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("Total Phrases", len(df))
+            st.metric("Total Phrases", facets.row_count)
         with col2:
-            unique_sources = len(df['Source_File'].unique())
-            st.metric("Source Files", unique_sources)
+            st.metric("Source Files", facets.source_file_count)
 
         st.caption("STRUCTURA v1.0")
         st.caption("Phrase Library Engine")
 
-    # Apply Filters
-    df_filtered = df.copy()
-
-    # Search filter (primary)
-    if search_query:
-        # Search across multiple columns
-        mask = (
-            df_filtered['Content'].str.contains(search_query, case=False, na=False) |
-            df_filtered['Element'].str.contains(search_query, case=False, na=False) |
-            df_filtered['Sub_Section'].str.contains(search_query, case=False, na=False)
-        )
-        df_filtered = df_filtered[mask]
-
-    # Dimension filters
-    if selected_section != "All":
-        df_filtered = df_filtered[df_filtered['Section'] == selected_section]
-
-    if selected_element != "All":
-        df_filtered = df_filtered[df_filtered['Element'] == selected_element]
-
-    if selected_age != "All":
-        df_filtered = df_filtered[df_filtered['Property_Age'] == selected_age]
-
-    if selected_style != "All":
-        df_filtered = df_filtered[df_filtered['Property_Style'] == selected_style]
+    # Apply Filters: intersect the search and facet bitmaps, then keep the
+    # search ranking (or insertion order without a search)
+    mask = facets.filter_mask(selections, search_mask)
+    if ranked_positions is not None:
+        positions = ranked_positions[mask[ranked_positions]]
+    else:
+        positions = np.flatnonzero(mask)
 
     # Main Content Area
-    st.subheader(f"📄 Results ({len(df_filtered)} phrases)")
+    st.subheader(f"📄 Results ({len(positions)} phrases)")
 
-    if not df_filtered.empty:
-        # Reorder columns for display
-        df_display = format_display_columns(df_filtered)
+    if len(positions):
+        # Only the current page is materialised and sent to the browser, so
+        # render time does not depend on how many phrases match
+        filter_state = (search_query, tuple(selections.items()))
+        start, stop = select_page(len(positions), filter_state)
+        df_display = format_display_columns(df.iloc[positions[start:stop]])
 
         # Display table
         st.dataframe(
@@ -238,34 +323,34 @@ def main():
             },
             hide_index=True,
             use_container_width=True,
-            height=600,
-            disabled=True  # Set to False if you want to edit cells directly
+            height=600
         )
 
         # Export options
         st.divider()
         col1, col2, col3 = st.columns(3)
 
+        # Exports cover every matching phrase, not just this page
         with col1:
-            csv = df_display.to_csv(index=False)
             st.download_button(
                 label="📥 Download CSV",
-                data=csv,
+                data=csv_export(df, positions),
                 file_name="phrases_export.csv",
-                mime="text/csv"
+                mime="text/csv",
+                on_click="ignore"
             )
 
         with col2:
-            excel_buffer = pd.ExcelWriter(index=False)
-            df_display.to_excel(excel_buffer, index=False)
             st.download_button(
                 label="📥 Download Excel",
-                data=excel_buffer.to_csv(),
-                file_name="phrases_export.xlsx"
+                data=excel_export_bytes(df, positions),
+                file_name="phrases_export.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                on_click="ignore"
             )
 
         with col3:
-            st.info(f"**{len(df_filtered)}** phrases selected")
+            st.info(f"**{len(positions)}** phrases selected")
 
     else:
         # No results
@@ -0,0 +1,119 @@
+"""
+Anonymize
+Local pre-pass that scrubs report text before it is sent to the model.
+
+The active ANONYMIZATION_PATTERNS and any known ANONYMIZATION_TERMS are
+compiled once into a single regular expression (one named group per
+pattern, terms as one literal alternation), so the text is scanned in one
+pass however many patterns there are. Each match is replaced with a
+placeholder such as [POSTCODE], and hits are counted per pattern.
+
+The miner runs this in its extraction workers (ANONYMIZE_BEFORE_SENDING):
+addresses, postcodes and phone numbers never leave the machine, and the
+model is left to generalise whatever the patterns can't catch.
+
+Run:
+    python anonymize.py report.txt [more.txt ...]   # Hit counts and throughput
+    python anonymize.py report.txt --show           # Also print the scrubbed text
+"""
+
+import re
+import sys
+import time
+import argparse
+from collections import Counter
+from config import (
+    ANONYMIZATION_PATTERNS,
+    ANONYMIZATION_ACTIVE_PATTERNS,
+    ANONYMIZATION_TERMS,
+)
+
+# Group name for ANONYMIZATION_TERMS matches
+TERM_GROUP = "term"
+
+
+def compile_patterns(patterns=ANONYMIZATION_PATTERNS, active=ANONYMIZATION_ACTIVE_PATTERNS,
+                     terms=ANONYMIZATION_TERMS):
+    """
+    Combine the active patterns and known terms into one compiled regex.
+
+    Returns:
+        compiled pattern, or None if there is nothing to match
+    """
+    parts = [f"(?P<{name}>{patterns[name]})" for name in active]
+    literals = sorted({t.strip() for t in terms if t.strip()}, key=len, reverse=True)
+    if literals:
+        # Longest first, so "Acacia Avenue" wins over "Acacia"
+        alternation = "|".join(re.escape(t) for t in literals)
+        parts.append(f"(?P<{TERM_GROUP}>(?i:\\b(?:{alternation})\\b))")
+    return re.compile("|".join(parts)) if parts else None
+
+
+_DEFAULT_PATTERN = compile_patterns()
+
+
+def placeholder(name):
+    """Replacement text for a match of pattern `name`."""
+    return "[REDACTED]" if name == TERM_GROUP else f"[{name.upper()}]"
+
+
+def anonymize(text, pattern=_DEFAULT_PATTERN):
+    """
+    Replace every match in `text` with its placeholder.
+
+    Returns:
+        (scrubbed_text, hits) - hits is a Counter of matches per pattern name
+    """
+    hits = Counter()
+    if pattern is None or not text:
+        return text, hits
+
+    parts = []
+    last = 0
+    for match in pattern.finditer(text):
+        # The pattern's own group encloses any inner groups, so it closes last
+        name = match.lastgroup
+        hits[name] += 1
+        parts.append(text[last:match.start()])
+        parts.append(placeholder(name))
+        last = match.end()
+    if not hits:
+        return text, hits
+    parts.append(text[last:])
+    return "".join(parts), hits
+
+
+def format_hits(hits):
+    """e.g. "3 postcode, 1 phone" (most frequent first)."""
+    return ", ".join(f"{count} {name}" for name, count in hits.most_common())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrub text files with the anonymization patterns.")
+    parser.add_argument("files", nargs="+", help="Text files to scrub")
+    parser.add_argument("--show", action="store_true", help="Print the scrubbed text")
+    args = parser.parse_args()
+
+    total_hits = Counter()
+    total_bytes = 0
+    total_seconds = 0.0
+    for path in args.files:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        started = time.perf_counter()
+        scrubbed, hits = anonymize(text)
+        total_seconds += time.perf_counter() - started
+        total_bytes += len(text.encode("utf-8"))
+        total_hits.update(hits)
+        print(f"{path}: {format_hits(hits) or 'no matches'}")
+        if args.show:
+            print(scrubbed)
+
+    mb_per_second = total_bytes / 1e6 / max(total_seconds, 1e-9)
+    print(f"\n{len(args.files)} file(s), {total_bytes / 1e6:.1f} MB in {total_seconds:.2f}s "
+          f"({mb_per_second:.0f} MB/s): {format_hits(total_hits) or 'no matches'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
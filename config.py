@@ -11,6 +11,52 @@ MASTER_DB_FILE = "Master_Phrase_Library.xlsx"
 OUTPUT_FILE = MASTER_DB_FILE  # Alias for compatibility
 MASTER_DB_SHEET_NAME = "Master"
 
+# SQLite phrase store (primary storage - the Excel workbook is an export target)
+STORE_DB_FILE = "phrase_library.db"
+STORE_TABLE_NAME = "phrases"
+
+# Manifest of mined reports (file hash -> status), kept in the phrase store so
+# it is updated in the same transaction as the mined phrases
+MANIFEST_TABLE_NAME = "mined_reports"
+
+# Write-ahead journal (phrase_journal.py): the importer and miner append each
+# finished file here, then compact it into the store once per run
+STORE_JOURNAL_FILE = "phrase_journal.jsonl"
+
+# Columnar (Parquet) snapshot of the store for fast dashboard cold starts.
+# Refreshed automatically whenever the store changes; requires pyarrow.
+STORE_SNAPSHOT_FILE = "phrase_library.parquet"
+
+# Near-duplicate detection (phrase_dedup.py). Phrases whose normalized Content
+# is at least DEDUP_THRESHOLD similar (estimated Jaccard over character
+# shingles) are merged; their Source_File values are kept as a list. Only
+# phrases with the same DEDUP_GROUP_COLUMNS values, negation words and numbers
+# are compared, and every merge is logged so it can be reviewed and undone.
+DEDUP_ON_INSERT = True
+DEDUP_THRESHOLD = 0.8
+DEDUP_GROUP_COLUMNS = ["Section", "Element", "Condition_Rating"]
+SOURCE_FILE_SEPARATOR = "; "
+
+# Columns indexed in the phrase store for fast filtering
+INDEXED_COLUMNS = [
+    "Section",
+    "Element",
+    "Property_Age",
+    "Property_Style",
+    "Condition_Rating"
+]
+
+# Dashboard sidebar filters (phrase_facets.py), with per-value counts
+FACET_COLUMNS = ["Section", "Element", "Property_Age", "Property_Style"]
+
+# Columns covered by the full-text search index (SQLite FTS5)
+SEARCH_COLUMNS = ["Content", "Element", "Sub_Section"]
+
+# Dashboard results table: rows per page, and the most rows rendered at once
+DASHBOARD_PAGE_SIZES = [25, 50, 100, 250, 500]
+DASHBOARD_DEFAULT_PAGE_SIZE = 50
+DASHBOARD_MAX_RENDER_ROWS = 500
+
 # Sheet names for legacy document ingestion (as per JBS structure)
 SECTIONS = [
     "Section_D_External",
@@ -86,6 +132,28 @@ PROPERTY_AGE_BANDS = [
     "2011-Present"
 ]
 
+# Typed in-memory phrase table (phrase_store.load_frame). These columns are
+# loaded as categoricals (integer codes plus one copy of each distinct value);
+# where a domain is listed its order is kept, and values outside it are kept
+# as extra categories. Content is held in a single Arrow string column.
+CATEGORICAL_COLUMNS = [
+    "Section",
+    "Element",
+    "Sub_Section",
+    "Condition_Rating",
+    "Property_Style",
+    "Property_Type",
+    "Property_Age",
+    "Source_File"
+]
+COLUMN_DOMAINS = {
+    "Section": SECTIONS,
+    "Condition_Rating": [str(r) for r in CONDITION_RATINGS],
+    "Property_Style": PROPERTY_STYLES,
+    "Property_Type": PROPERTY_TYPES,
+    "Property_Age": PROPERTY_AGE_BANDS,
+}
+
 # ============================================================================
 # FILE PROCESSING SETTINGS
 # ============================================================================
@@ -94,6 +162,37 @@ PROPERTY_AGE_BANDS = [
 SUPPORTED_WORD_FORMATS = [".doc", ".docx"]
 SUPPORTED_PDF_FORMATS = [".pdf"]
 
+# PDF text extraction (pdf_extract.py)
+PDF_EXTRACT_WORKERS = None       # Worker processes (None = one per CPU core)
+PDF_PAGES_PER_TASK = 16          # Pages per task when splitting a large PDF
+PDF_PAGE_TIMEOUT = 30            # Seconds before giving up on one page (POSIX only)
+
+# Word parsing for 2_import_word_docs.py: "streaming" reads document.xml
+# incrementally (docx_stream.py); "python-docx" builds the full object tree
+DOCX_PARSER = "streaming"
+
+# Word import (2_import_word_docs.py): folders to scan and filename patterns
+IMPORT_DIRS = ["."]
+IMPORT_GLOBS = ["*.docx"]
+IMPORT_RECURSIVE = False         # Also scan subfolders (hidden folders are skipped)
+IMPORT_WORKERS = None            # Parser processes (None = one per CPU core)
+IMPORT_WRITE_BATCH_SIZE = 2000   # Phrases per phrase-store transaction
+
+# Extracted-text cache (text_cache.py): file hash -> extracted text, shared by
+# the importer, knowledge bank builder and miner. Least recently used entries
+# are evicted once the cache exceeds TEXT_CACHE_MAX_MB.
+TEXT_CACHE_DIR = ".text_cache"
+TEXT_CACHE_MAX_MB = 1024
+
+# Model response cache (response_cache.py): request hash -> complete response
+# text, so rerunning the miner (or replaying with --cache-only) doesn't pay for
+# the same request twice. Entries expire after RESPONSE_CACHE_TTL_DAYS; least
+# recently used entries are evicted once the cache exceeds RESPONSE_CACHE_MAX_MB.
+RESPONSE_CACHE = True
+RESPONSE_CACHE_DIR = ".response_cache"
+RESPONSE_CACHE_MAX_MB = 256
+RESPONSE_CACHE_TTL_DAYS = 90
+
 # Regex patterns for parsing
 HEADER_PATTERN = r"^#+\s+(.+)$"  # Markdown-style headers
 SECTION_PATTERN = r"^(External|Internal|Services|Grounds|Overall):\s*(.+)$"
@@ -107,6 +206,48 @@ LLM_MODEL = "claude-3-5-sonnet-20241022"
 LLM_TEMPERATURE = 0.3  # Lower temperature for consistency
 LLM_MAX_TOKENS = 1000
 
+# Report miner (4_mine_reports.py) pipeline settings
+MINER_CONCURRENCY = 4            # Parallel model calls in flight
+MINER_EXTRACT_WORKERS = 2        # PDF extraction worker processes
+MINER_MAX_RETRIES = 5            # Retries on rate limit / overload / server errors
+MINER_BACKOFF_BASE = 2.0         # Seconds; doubled on each retry (with jitter)
+MINER_BACKOFF_MAX = 60.0         # Upper bound on a single backoff wait (seconds)
+
+# Long reports are split into chunks (report_chunks.py), one model call each,
+# at page markers and survey-section headings. Output is at least as large as
+# a chunk, so the phrases rewritten from a whole chunk fit in one response.
+MINER_CHUNK_TOKENS = 8000        # Max (estimated) tokens of report text per call
+MINER_MAX_OUTPUT_TOKENS = 8000   # max_tokens for each call
+MINER_MAX_CONTINUATIONS = 2      # Follow-up calls for output cut off by max_tokens
+# Prompts (cached prefix + reference passages + chunk) estimated above this are
+# split again before sending; a prompt that can't be split under it is rejected
+MINER_MAX_PROMPT_TOKENS = 30000
+
+# Per-report metrics for every run (run_log.py), one JSON object per line
+MINER_RUN_LOG_FILE = "mining_runs.jsonl"
+
+# Batch mode (4_mine_reports.py --batch): requests go through the Message
+# Batches API, which costs less and returns results within 24 hours
+MINER_BATCH_MAX_REQUESTS = 10000  # Requests per submitted batch (API limit: 100,000)
+MINER_BATCH_POLL_SECONDS = 60     # Wait between batch status checks
+# Lines treated as survey-section headings, e.g. "D1 Chimney stacks", "Section E"
+REPORT_HEADING_PATTERN = r"^(?:(?i:section)\s+[A-L]\b.*|[A-L]\d{1,2}\.?\s+[A-Z][^\n]{0,60})$"
+
+# Knowledge bank retrieval (3_build_knowledge_bank.py -> 4_mine_reports.py)
+KNOWLEDGE_BANK_FILE = "knowledge_bank.json"      # Full text per reference document
+KNOWLEDGE_INDEX_FILE = "knowledge_index.json"    # Passages + BM25 index
+KNOWLEDGE_STATE_FILE = "knowledge_bank_state.json"  # Per-file mtime/size/hash for incremental rebuilds
+KB_PASSAGE_WORDS = 200           # Words per passage
+KB_PASSAGE_OVERLAP = 40          # Words shared between consecutive passages
+KB_TOP_K = 12                    # Max passages sent with each report
+KB_CONTEXT_TOKEN_BUDGET = 6000   # Max (estimated) tokens of reference material per call
+CHARS_PER_TOKEN = 4              # Rough token estimate for English text
+
+# Prompt caching: instructions plus a fixed set of core reference passages form
+# a stable prefix that the API caches and reuses across every report in a run.
+PROMPT_CACHING = True
+KB_CACHED_CONTEXT_TOKEN_BUDGET = 8000   # Core reference passages in the cached prefix
+
 # Anonymization patterns to remove
 ANONYMIZATION_PATTERNS = {
     "address": r"\d+\s+[A-Za-z]+\s+(Street|Road|Avenue|Lane|Court|Close|Drive|Way)",
@@ -115,6 +256,18 @@ ANONYMIZATION_PATTERNS = {
     "name": r"\b[A-Z][a-z]+\s+[A-Z][a-z]+\b"  # Simple name pattern
 }
 
+# Report text is scrubbed locally (anonymize.py) before it is sent to the model.
+# Matches are replaced with a placeholder such as [POSTCODE].
+ANONYMIZE_BEFORE_SENDING = True
+
+# Patterns used for the local pre-pass. "name" is left to the model: it also
+# matches element headings such as "Chimney Stacks" and "Building Regulations".
+ANONYMIZATION_ACTIVE_PATTERNS = ["address", "postcode", "phone"]
+
+# Known names/streets to remove wherever they appear (whole words, any case),
+# e.g. ["Smith", "Acacia Avenue"]. Matched with the patterns in the same pass.
+ANONYMIZATION_TERMS = []
+
 # ============================================================================
 # DATABASE CONSTRAINTS
 # ============================================================================
@@ -125,6 +278,35 @@ MAX_CONTENT_LENGTH = 32767
 # Minimum content length before adding to DB
 MIN_CONTENT_LENGTH = 20
 
+# Validation of every batch before it is stored (phrase_validate.py)
+VALIDATE_ON_INSERT = True
+
+# Values accepted in any COLUMN_DOMAINS column, meaning "not specified"
+DOMAIN_WILDCARDS = ["", "Any"]
+
+# Other spellings mapped onto domain values (matched ignoring case/punctuation).
+# The miner classifies by survey section; the store uses the sheet names.
+VALUE_ALIASES = {
+    "Section": {
+        "External": "Section_D_External",
+        "Internal": "Section_E_Internal",
+        "Services": "Section_F_Services",
+        "Grounds": "Section_G_Grounds",
+        "Overall": "Sections_A-C_H_I_J_K",
+    },
+    "Condition_Rating": {"Good": "1", "Fair": "2", "Poor": "3"},
+}
+
+# Similarity cutoff (0-1) for fuzzy matches, e.g. "semi detatched" -> "Semi-Detached"
+FUZZY_MATCH_CUTOFF = 0.85
+
+# Domain values that still can't be mapped: cleared and reported (False),
+# or the whole row is rejected (True)
+REJECT_UNKNOWN_DOMAIN_VALUES = False
+
+# Rejected rows are appended here, with the reason
+REJECTION_REPORT_FILE = "rejected_phrases.jsonl"
+
 # ============================================================================
 # LOGGING & ERROR HANDLING
 # ============================================================================
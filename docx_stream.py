@@ -0,0 +1,95 @@
+"""
+DOCX Stream
+Streaming paragraph reader for .docx files.
+
+Reads word/document.xml straight from the zip with iterparse and yields one
+(text, is_bold) pair per body paragraph, clearing each element once it has
+been handled. Unlike python-docx no object tree is built, so memory stays
+flat regardless of document size.
+
+Output matches python-docx's view of a document: top-level body paragraphs
+only (not table cells), text from w:t runs with tabs and line breaks, and
+is_bold when any run has direct bold formatting (like `run.bold`).
+"""
+
+import zipfile
+import xml.etree.ElementTree as ET
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+BODY = W_NS + "body"
+PARAGRAPH = W_NS + "p"
+RUN = W_NS + "r"
+HYPERLINK = W_NS + "hyperlink"
+RUN_PROPS = W_NS + "rPr"
+BOLD = W_NS + "b"
+TEXT = W_NS + "t"
+TAB = W_NS + "tab"
+BREAKS = {W_NS + "br", W_NS + "cr"}
+VAL = W_NS + "val"
+
+_FALSE_VALUES = {"0", "false", "off"}
+
+
+def _run_is_bold(run):
+    props = run.find(RUN_PROPS)
+    if props is None:
+        return False
+    bold = props.find(BOLD)
+    return bold is not None and bold.get(VAL, "true").lower() not in _FALSE_VALUES
+
+
+def _paragraph_content(paragraph):
+    """Return (text, is_bold) for a w:p element (runs and hyperlink runs only)."""
+    parts = []
+    is_bold = False
+    for child in paragraph:
+        if child.tag == RUN:
+            runs = (child,)
+        elif child.tag == HYPERLINK:
+            runs = child.findall(RUN)
+        else:
+            continue  # Bookmarks, field markers, etc.
+        for run in runs:
+            if not is_bold and _run_is_bold(run):
+                is_bold = True
+            _append_run_text(run, parts)
+    return "".join(parts), is_bold
+
+
+def _append_run_text(run, parts):
+    for child in run:
+        if child.tag == TEXT:
+            parts.append(child.text or "")
+        elif child.tag == TAB:
+            parts.append("\t")
+        elif child.tag in BREAKS:
+            parts.append("\n")
+
+
+def iter_docx_paragraphs(file_path):
+    """
+    Yield (text, is_bold) for each top-level paragraph of a .docx file.
+
+    Raises zipfile.BadZipFile / KeyError / ET.ParseError for files that are
+    not valid .docx documents.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open("word/document.xml") as xml_file:
+            body = None
+            depth = 0
+            body_depth = None
+            for event, element in ET.iterparse(xml_file, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if element.tag == BODY:
+                        body = element
+                        body_depth = depth
+                    continue
+
+                # "end" event: a direct child of w:body is complete
+                if body is not None and depth == body_depth + 1:
+                    if element.tag == PARAGRAPH:
+                        yield _paragraph_content(element)
+                    body.remove(element)
+                depth -= 1
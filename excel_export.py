@@ -0,0 +1,168 @@
+"""
+Excel Export
+Streaming (write-only) Excel export of the phrase library.
+
+Master and the section sheets are regenerated in a single pass over the
+rows with openpyxl's write-only mode: each row is written out as it is read
+and strings are stored inline, so memory stays flat however large the
+library is. Header styling, column widths and dropdown validation are the
+ones 1_setup_database.py creates, and are defined here for both.
+"""
+
+import os
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.worksheet.datavalidation import DataValidation
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+from config import (
+    MASTER_DB_SHEET_NAME,
+    SECTIONS,
+    STANDARD_COLUMNS,
+    CONDITION_RATINGS,
+    PROPERTY_STYLES,
+    PROPERTY_TYPES,
+    PROPERTY_AGE_BANDS,
+)
+
+# ============================================================================
+# WORKBOOK LAYOUT (shared with 1_setup_database.py)
+# ============================================================================
+
+HEADER_FILL = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+HEADER_FONT = Font(bold=True, color="FFFFFF", size=11)
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center", wrap_text=True)
+HEADER_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+
+COLUMN_WIDTHS = {
+    "Section": 15,
+    "Element": 25,
+    "Sub_Section": 20,
+    "Content": 50,
+    "Condition_Rating": 12,
+    "Property_Style": 18,
+    "Property_Type": 15,
+    "Property_Age": 18,
+    "Source_File": 25
+}
+DEFAULT_COLUMN_WIDTH = 15
+
+# Dropdown lists, by column
+VALIDATION_LISTS = {
+    "Condition_Rating": [str(r) for r in CONDITION_RATINGS],
+    "Property_Style": PROPERTY_STYLES,
+    "Property_Type": PROPERTY_TYPES,
+    "Property_Age": PROPERTY_AGE_BANDS,
+}
+
+# Validation covers at least this many rows, so there is room to add phrases
+VALIDATION_MIN_ROWS = 1000
+
+
+def style_header_cell(cell):
+    """Apply the header formatting to a cell (regular or write-only)."""
+    cell.fill = HEADER_FILL
+    cell.font = HEADER_FONT
+    cell.alignment = HEADER_ALIGNMENT
+    cell.border = HEADER_BORDER
+
+
+def make_validation(column_name, data_list):
+    """Dropdown list validation for a column (not yet bound to any cells)."""
+    dv = DataValidation(
+        type="list",
+        formula1=f'"{",".join(str(v) for v in data_list)}"',
+        allow_blank=False
+    )
+    dv.error = f"Please select a valid {column_name}"
+    dv.errorTitle = "Invalid Entry"
+    dv.prompt = f"Select from {column_name} list"
+    dv.promptTitle = column_name
+    return dv
+
+
+# ============================================================================
+# STREAMING WRITER
+# ============================================================================
+
+def _create_sheet(wb, title):
+    ws = wb.create_sheet(title)
+    for col_idx, column_name in enumerate(STANDARD_COLUMNS, start=1):
+        width = COLUMN_WIDTHS.get(column_name, DEFAULT_COLUMN_WIDTH)
+        ws.column_dimensions[get_column_letter(col_idx)].width = width
+
+    header = []
+    for column_name in STANDARD_COLUMNS:
+        cell = WriteOnlyCell(ws, value=column_name)
+        style_header_cell(cell)
+        header.append(cell)
+    ws.append(header)
+    return ws
+
+
+def _add_validations(ws, data_rows):
+    end_row = max(VALIDATION_MIN_ROWS, data_rows + 1)
+    for column_name, data_list in VALIDATION_LISTS.items():
+        if column_name not in STANDARD_COLUMNS:
+            continue
+        col_letter = get_column_letter(STANDARD_COLUMNS.index(column_name) + 1)
+        dv = make_validation(column_name, data_list)
+        dv.add(f"{col_letter}2:{col_letter}{end_row}")
+        ws.data_validations.append(dv)
+
+
+def write_workbook(rows, output, sections=SECTIONS, master_sheet=MASTER_DB_SHEET_NAME):
+    """
+    Write phrase rows to a new workbook in one pass.
+
+    Args:
+        rows: iterable of rows in STANDARD_COLUMNS order (e.g. phrase_store.iter_rows)
+        output: file path (replaced atomically) or binary file object
+        sections: section sheet names; a row is also written to the sheet
+            named by its Section. Pass () for a single-sheet workbook.
+        master_sheet: name of the sheet that receives every row
+
+    Returns:
+        Number of rows written to the master sheet
+    """
+    wb = Workbook(write_only=True)
+    master_ws = _create_sheet(wb, master_sheet)
+    section_sheets = {
+        section: _create_sheet(wb, section)
+        for section in sections if section != master_sheet
+    }
+    counts = {section: 0 for section in section_sheets}
+
+    section_idx = STANDARD_COLUMNS.index("Section")
+    written = 0
+    for row in rows:
+        row = list(row)
+        master_ws.append(row)
+        written += 1
+        section = row[section_idx]
+        if section in section_sheets:
+            section_sheets[section].append(row)
+            counts[section] += 1
+
+    # Validations are written when the sheet is closed, so they can be sized
+    # to the data after streaming the rows
+    _add_validations(master_ws, written)
+    for section, ws in section_sheets.items():
+        _add_validations(ws, counts[section])
+
+    if isinstance(output, (str, os.PathLike)):
+        tmp_path = f"{output}.tmp"
+        try:
+            wb.save(tmp_path)
+            os.replace(tmp_path, output)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    else:
+        wb.save(output)
+    return written
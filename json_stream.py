@@ -0,0 +1,119 @@
+"""
+JSON Stream
+Incremental parser for the report miner's streamed JSON output.
+
+The model answers with a JSON array of phrase objects. JsonArrayParser is
+fed the text as it arrives and hands back each object as soon as its
+closing brace is seen, so nothing waits for the whole response and one bad
+element doesn't cost the rest:
+
+- an element that closes but isn't valid JSON is counted and skipped
+- text after the last complete element (output cut off by max_tokens or a
+  dropped connection) can be discarded with rewind(); `text` is then the
+  output up to that element, which the miner sends back as the start of
+  the assistant's reply so the model continues with the missing tail only
+
+Scanning jumps between structural characters with a regex, so each piece of
+text is looked at once.
+"""
+
+import re
+import json
+
+_STRUCTURAL = re.compile(r'[\[\]{}"]')
+_STRING_END = re.compile(r'["\\]')
+
+
+class JsonArrayParser:
+    """Parse a JSON array of objects from text fed in pieces."""
+
+    def __init__(self):
+        self.objects = []       # Complete objects, in order
+        self.errors = 0         # Elements that closed but weren't valid JSON objects
+        self.started = False    # Opening "[" seen
+        self.complete = False   # Closing "]" seen
+        self._committed = []    # Text up to the last complete element (or the "[")
+        self._buffer = ""       # Text after it
+        self._pos = 0           # Scan position in _buffer
+        self._depth = 0
+        self._in_string = False
+
+    @property
+    def text(self):
+        """All text fed so far (after any rewind)."""
+        return "".join(self._committed) + self._buffer
+
+    def feed(self, piece):
+        """Add text; returns the objects it completed."""
+        self._buffer += piece
+        completed = []
+        i = self._pos
+        while i < len(self._buffer) and not self.complete:
+            buffer = self._buffer
+            if self._in_string:
+                match = _STRING_END.search(buffer, i)
+                if match is None:
+                    i = len(buffer)
+                    break
+                i = match.start()
+                if buffer[i] == "\\":
+                    i += 2  # Skip the escaped character (may be in the next piece)
+                    continue
+                self._in_string = False
+                i += 1
+                continue
+
+            match = _STRUCTURAL.search(buffer, i)
+            if match is None:
+                i = len(buffer)
+                break
+            i = match.start()
+            char = buffer[i]
+            if not self.started:
+                # Skip anything before the array, e.g. a ```json fence
+                if char == "[":
+                    self.started = True
+                    i = self._commit(i)
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+            elif self._depth == 0:
+                if char == "]":
+                    self.complete = True
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_element(buffer, i, completed)
+                    i = self._commit(i)
+            i += 1
+        self._pos = i
+        return completed
+
+    def _commit(self, i):
+        """Move the buffer up to and including position i into the committed text."""
+        self._committed.append(self._buffer[:i + 1])
+        self._buffer = self._buffer[i + 1:]
+        return -1
+
+    def _finish_element(self, buffer, i, completed):
+        element = buffer[:i + 1].lstrip(" \t\r\n,")
+        try:
+            value = json.loads(element)
+        except json.JSONDecodeError:
+            self.errors += 1
+            return
+        if isinstance(value, dict):
+            self.objects.append(value)
+            completed.append(value)
+        else:
+            self.errors += 1
+
+    def rewind(self):
+        """Drop any text after the last complete element (see `text`)."""
+        if not self.started:
+            self._committed = []
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
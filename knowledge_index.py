@@ -0,0 +1,163 @@
+"""
+Knowledge Index
+Passage chunking and BM25 retrieval over the knowledge bank.
+
+3_build_knowledge_bank.py splits each reference document into overlapping
+passages and saves a BM25 index (knowledge_index.json). 4_mine_reports.py then
+retrieves the passages most relevant to each report, under a token budget,
+instead of sending the same fixed slice of the whole bank with every call.
+"""
+
+import os
+import re
+import json
+import math
+from collections import Counter
+from config import (
+    KNOWLEDGE_INDEX_FILE,
+    KB_PASSAGE_WORDS,
+    KB_PASSAGE_OVERLAP,
+    KB_TOP_K,
+    KB_CONTEXT_TOKEN_BUDGET,
+    CHARS_PER_TOKEN,
+)
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Only the most distinctive report terms are used as the query
+MAX_QUERY_TERMS = 64
+
+_TOKEN = re.compile(r"[a-z][a-z0-9\-]{2,}")
+
+STOPWORDS = {
+    "the", "and", "for", "are", "was", "were", "with", "that", "this", "from",
+    "have", "has", "had", "not", "but", "all", "any", "can", "may", "should",
+    "will", "would", "could", "which", "there", "their", "been", "being", "into",
+    "its", "also", "such", "these", "those", "than", "then", "they", "them",
+    "our", "you", "your", "where", "when", "what", "who", "how", "page", "other",
+}
+
+
+def estimate_tokens(text):
+    """Rough token count used for budgeting prompts."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def tokenize(text):
+    """Lowercase index terms (3+ chars, stopwords removed)."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def chunk_passages(text, size=KB_PASSAGE_WORDS, overlap=KB_PASSAGE_OVERLAP):
+    """Split text into passages of `size` words, overlapping by `overlap` words."""
+    words = text.split()
+    if not words:
+        return []
+    step = max(size - overlap, 1)
+    passages = []
+    for start in range(0, len(words), step):
+        passages.append(" ".join(words[start:start + size]))
+        if start + size >= len(words):
+            break
+    return passages
+
+
+def build_index(knowledge_store):
+    """
+    Chunk every document and build a BM25 index.
+
+    Args:
+        knowledge_store: dict of {filename: full text}
+
+    Returns:
+        Index dict (JSON-serialisable) with passages, lengths and postings
+    """
+    passages = []
+    lengths = []
+    postings = {}
+
+    for source, text in knowledge_store.items():
+        for passage in chunk_passages(text):
+            passage_id = len(passages)
+            terms = Counter(tokenize(passage))
+            passages.append({"source": source, "text": passage})
+            lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                postings.setdefault(term, []).append([passage_id, tf])
+
+    return {
+        "passages": passages,
+        "lengths": lengths,
+        "avg_length": (sum(lengths) / len(lengths)) if lengths else 0.0,
+        "postings": postings,
+    }
+
+
+def save_index(index, path=KNOWLEDGE_INDEX_FILE):
+    """Write the index atomically (readers never see a half-written file)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_index(path=KNOWLEDGE_INDEX_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _idf(index, term):
+    n = len(index["passages"])
+    df = len(index["postings"].get(term, ()))
+    return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+
+def _query_terms(index, query_text):
+    """Pick the report terms that best characterise it (tf x idf)."""
+    counts = Counter(t for t in tokenize(query_text) if t in index["postings"])
+    weighted = sorted(counts, key=lambda t: counts[t] * _idf(index, t), reverse=True)
+    return weighted[:MAX_QUERY_TERMS]
+
+
+def retrieve(index, query_text, top_k=KB_TOP_K, token_budget=KB_CONTEXT_TOKEN_BUDGET,
+             exclude=()):
+    """
+    Return the passages most relevant to `query_text`, best first: up to
+    top_k passages within token_budget. A passage that would exceed the budget
+    is skipped and lower-ranked, shorter ones can still fill it. Passages in
+    `exclude` (e.g. already in the cached prompt prefix) are skipped.
+    """
+    if not index or not index.get("passages"):
+        return []
+
+    lengths = index["lengths"]
+    avg_length = index["avg_length"] or 1.0
+    scores = Counter()
+
+    for term in _query_terms(index, query_text):
+        idf = _idf(index, term)
+        for passage_id, tf in index["postings"][term]:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[passage_id] / avg_length)
+            scores[passage_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+    selected = []
+    used_tokens = 0
+    for passage_id, _score in scores.most_common():
+        passage = index["passages"][passage_id]
+        if passage in exclude:
+            continue
+        tokens = estimate_tokens(passage["text"])
+        if used_tokens + tokens > token_budget:
+            continue
+        selected.append(passage)
+        used_tokens += tokens
+        if len(selected) >= top_k:
+            break
+    return selected
+
+
+def format_passages(passages):
+    """Render retrieved passages as prompt context, labelled by source document."""
+    return "\n\n".join(f"[{p['source']}]\n{p['text']}" for p in passages)
@@ -0,0 +1,155 @@
+"""
+PDF Extraction
+Shared PDF text extraction for 3_build_knowledge_bank.py and 4_mine_reports.py.
+
+Pages are extracted with pdfplumber and collected in a list (joined once at
+the end). Large documents are split into page ranges and fanned out, with
+other documents, over a process pool so extraction scales with core count.
+A per-page timeout stops one pathological page from stalling a whole run.
+"""
+
+import os
+import time
+import signal
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pdfplumber
+from config import PDF_EXTRACT_WORKERS, PDF_PAGES_PER_TASK, PDF_PAGE_TIMEOUT
+
+# Cache key component for text_cache - bump when extraction output changes
+EXTRACTOR_VERSION = "pdfplumber-pages-v1"
+
+# pages: list of page texts ("" for blank/failed pages), in page order
+ExtractionResult = namedtuple("ExtractionResult", ["pages", "seconds", "failed_pages", "error"])
+
+
+class PageTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise PageTimeout()
+
+
+def _can_use_alarm():
+    """SIGALRM timeouts only work on POSIX, in the main thread of a process."""
+    return hasattr(signal, "SIGALRM") and threading.current_thread() is threading.main_thread()
+
+
+def _extract_page(page, page_timeout):
+    if not page_timeout or not _can_use_alarm():
+        return page.extract_text() or ""
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, page_timeout)
+    try:
+        return page.extract_text() or ""
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def extract_page_range(pdf_path, start=0, stop=None, page_timeout=PDF_PAGE_TIMEOUT):
+    """
+    Extract pages [start, stop) of a PDF.
+
+    Pages that raise or exceed page_timeout are returned as "" and counted in
+    failed_pages; an unreadable file is reported in `error`.
+    """
+    started = time.perf_counter()
+    pages = []
+    failed = 0
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages[start:stop]:
+                try:
+                    pages.append(_extract_page(page, page_timeout))
+                except Exception:
+                    pages.append("")
+                    failed += 1
+    except Exception as e:
+        return ExtractionResult(pages, time.perf_counter() - started, failed, str(e))
+    return ExtractionResult(pages, time.perf_counter() - started, failed, None)
+
+
+def count_pages(pdf_path):
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_documents(pdf_paths, workers=PDF_EXTRACT_WORKERS,
+                      pages_per_task=PDF_PAGES_PER_TASK, page_timeout=PDF_PAGE_TIMEOUT):
+    """
+    Extract several PDFs in parallel, splitting large ones into page ranges.
+
+    Returns:
+        (results, stats) - {path: ExtractionResult} and a dict with total
+        pages, failed pages, wall-clock seconds and pages_per_second
+    """
+    started = time.perf_counter()
+    tasks = []
+    errors = {}
+    for path in pdf_paths:
+        try:
+            page_count = count_pages(path)
+        except Exception as e:
+            errors[path] = str(e)
+            continue
+        for start in range(0, max(page_count, 1), pages_per_task):
+            tasks.append((path, start, start + pages_per_task))
+
+    parts = {path: [] for path in pdf_paths}
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(extract_page_range, path, start, stop, page_timeout): (path, start)
+                for path, start, stop in tasks
+            }
+            for future in as_completed(futures):
+                path, start = futures[future]
+                parts[path].append((start, future.result()))
+
+    results = {}
+    for path in pdf_paths:
+        if path in errors:
+            results[path] = ExtractionResult([], 0.0, 0, errors[path])
+            continue
+        chunks = sorted(parts[path], key=lambda chunk: chunk[0])
+        pages = [text for _, r in chunks for text in r.pages]
+        error = next((r.error for _, r in chunks if r.error), None)
+        results[path] = ExtractionResult(
+            pages,
+            sum(r.seconds for _, r in chunks),
+            sum(r.failed_pages for _, r in chunks),
+            error,
+        )
+
+    elapsed = time.perf_counter() - started
+    total_pages = sum(len(r.pages) for r in results.values())
+    stats = {
+        "documents": len(pdf_paths),
+        "pages": total_pages,
+        "failed_pages": sum(r.failed_pages for r in results.values()),
+        "seconds": elapsed,
+        "pages_per_second": total_pages / elapsed if elapsed > 0 else 0.0,
+    }
+    return results, stats
+
+
+def join_pages(pages):
+    """Plain text of a document, blank pages dropped."""
+    return "\n".join(text for text in pages if text)
+
+
+def join_pages_with_markers(pages):
+    """Document text with "--- Page N ---" markers (used by the report miner)."""
+    return "".join(
+        f"\n--- Page {page_num} ---\n{text}"
+        for page_num, text in enumerate(pages, 1)
+        if text
+    )
+
+
+def default_workers():
+    """Number of worker processes used when PDF_EXTRACT_WORKERS is None."""
+    return PDF_EXTRACT_WORKERS or os.cpu_count() or 1
@@ -0,0 +1,421 @@
+"""
+Phrase Dedup
+Near-duplicate phrase detection for the phrase store, using MinHash
+signatures over character shingles of the normalized Content and
+locality-sensitive hashing (LSH) to find candidates.
+
+Each phrase's signature is split into bands; phrases that share any band
+bucket are candidates, and a candidate is a duplicate if its estimated
+Jaccard similarity is at least DEDUP_THRESHOLD. Only candidates are compared,
+so the cost per phrase does not grow with the size of the library.
+
+Wording alone can't tell "No evidence of rising damp" from "Evidence of
+rising damp", so a candidate must also have the same DEDUP_GROUP_COLUMNS
+values (Section, Element, Condition_Rating) and the same negation words and
+numbers as the phrase.
+
+phrase_store.insert_phrases uses this at insert time (DEDUP_ON_INSERT): a
+duplicate is not inserted; its Source_File is added to the provenance list of
+the existing phrase instead. Every merge is logged with the merged phrase in
+full, so it can be reviewed and undone.
+
+Run:
+    python phrase_dedup.py             # Index and merge duplicates already in the store
+    python phrase_dedup.py --dry-run   # Report duplicates without changing anything
+    python phrase_dedup.py --merges    # List logged merges
+    python phrase_dedup.py --undo ID   # Restore a merged phrase as a row of its own
+"""
+
+import re
+import sys
+import json
+import zlib
+import hashlib
+import argparse
+from datetime import datetime
+import numpy as np
+from config import DEDUP_THRESHOLD, DEDUP_GROUP_COLUMNS, SOURCE_FILE_SEPARATOR
+
+# MinHash / LSH parameters: 8 bands x 8 rows puts the LSH threshold at
+# about (1/8) ** (1/8) = 0.77, just below DEDUP_THRESHOLD
+NUM_PERM = 64
+BANDS = 8
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+SIGNATURE_TABLE = "phrase_minhash"
+LSH_TABLE = "phrase_lsh"
+MERGES_TABLE = "phrase_merges"
+
+# Words that reverse a phrase's meaning; phrases are only merged if they have
+# as many of them (and the same numbers), however similar the rest
+NEGATION_WORDS = frozenset({
+    "no", "not", "nor", "never", "none", "nothing", "neither", "without", "cannot", "nil",
+})
+
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.RandomState(20250119)  # Fixed: signatures are persisted
+_PERM_A = _rng.randint(1, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+_WORD = re.compile(r"\w+")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def normalize(content):
+    """Lowercase, strip punctuation and collapse whitespace."""
+    text = _NON_WORD.sub(" ", str(content).lower())
+    return _SPACES.sub(" ", text).strip()
+
+
+def meaning_tokens(content):
+    """Negation count and numbers of a phrase; must be equal for a merge."""
+    text = str(content).lower().replace("n't", " not")
+    negations = sum(1 for word in _WORD.findall(text) if word in NEGATION_WORDS)
+    return negations, tuple(sorted(_NUMBER.findall(text)))
+
+
+def shingles(text):
+    """Character shingles of the normalized text."""
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(content):
+    """MinHash signature (uint32 array of NUM_PERM values) of a phrase's Content."""
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) & 0x7FFFFFFF for s in shingles(normalize(content))),
+        dtype=np.uint64
+    )
+    if hashes.size == 0:
+        hashes = np.zeros(1, dtype=np.uint64)
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def band_buckets(signature):
+    """One bucket key per band (signed 64-bit, so it fits a SQLite INTEGER)."""
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()
+        digest = hashlib.blake2b(chunk, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(sig_a == sig_b)) / NUM_PERM
+
+
+def split_sources(value):
+    """The Source_File values in a provenance list."""
+    return [s for s in (value or "").split(SOURCE_FILE_SEPARATOR) if s]
+
+
+def merge_sources(existing, new):
+    """Add `new` Source_File value(s) to a provenance list, without repeats."""
+    sources = split_sources(existing)
+    for source in split_sources(new):
+        if source not in sources:
+            sources.append(source)
+    return SOURCE_FILE_SEPARATOR.join(sources)
+
+
+def remove_sources(existing, removed):
+    """Take Source_File value(s) out of a provenance list ("" if none remain)."""
+    removed = set(split_sources(removed))
+    return SOURCE_FILE_SEPARATOR.join(s for s in split_sources(existing) if s not in removed)
+
+
+# ============================================================================
+# STORE INTEGRATION
+# ============================================================================
+
+def init_schema(conn, phrases_table):
+    """Create the signature and LSH bucket tables alongside the phrases table."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SIGNATURE_TABLE} (
+            phrase_id INTEGER PRIMARY KEY,
+            signature BLOB NOT NULL
+        )
+    """)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {LSH_TABLE} (
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            phrase_id INTEGER NOT NULL
+        )
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{LSH_TABLE}_bucket ON {LSH_TABLE} (band, bucket)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{LSH_TABLE}_phrase ON {LSH_TABLE} (phrase_id)")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {phrases_table}_dedup_ad
+        AFTER DELETE ON "{phrases_table}" BEGIN
+            DELETE FROM {SIGNATURE_TABLE} WHERE phrase_id = old.id;
+            DELETE FROM {LSH_TABLE} WHERE phrase_id = old.id;
+        END
+    """)
+    # Merge log: kept_id absorbed the phrase in `row` (JSON), whose id was
+    # merged_from_id if it had been stored; added_sources were added to
+    # kept_id's provenance list by the merge
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MERGES_TABLE} (
+            id INTEGER PRIMARY KEY,
+            kept_id INTEGER NOT NULL,
+            merged_from_id INTEGER,
+            source TEXT NOT NULL DEFAULT '',
+            added_sources TEXT NOT NULL DEFAULT '',
+            similarity REAL NOT NULL,
+            merged_at TEXT NOT NULL,
+            row TEXT NOT NULL
+        )
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{MERGES_TABLE}_kept ON {MERGES_TABLE} (kept_id)")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {phrases_table}_merges_ad
+        AFTER DELETE ON "{phrases_table}" BEGIN
+            DELETE FROM {MERGES_TABLE} WHERE kept_id = old.id;
+        END
+    """)
+
+
+def group_key(row):
+    """The DEDUP_GROUP_COLUMNS values of a row dict; only equal groups are merged."""
+    return tuple(str(row.get(col) or "") for col in DEDUP_GROUP_COLUMNS)
+
+
+def find_duplicate(conn, phrases_table, signature, row, threshold=DEDUP_THRESHOLD):
+    """
+    Find an indexed phrase that `row` (with MinHash `signature`) duplicates:
+    same group (see group_key), same negations and numbers, and estimated
+    similarity of at least `threshold`.
+
+    Returns:
+        (phrase_id, similarity), or None
+    """
+    group_sql = " AND ".join(f'p."{col}" = ?' for col in DEDUP_GROUP_COLUMNS)
+    meaning = meaning_tokens(row.get("Content", ""))
+    seen = set()
+    for band, bucket in enumerate(band_buckets(signature)):
+        candidates = conn.execute(
+            f'SELECT l.phrase_id, s.signature, p."Content" FROM {LSH_TABLE} l '
+            f'JOIN {SIGNATURE_TABLE} s ON s.phrase_id = l.phrase_id '
+            f'JOIN "{phrases_table}" p ON p.id = l.phrase_id '
+            f'WHERE l.band = ? AND l.bucket = ? AND {group_sql}',
+            (band, bucket, *group_key(row))
+        )
+        for phrase_id, candidate_signature, content in candidates:
+            if phrase_id in seen:
+                continue
+            seen.add(phrase_id)
+            score = similarity(signature, np.frombuffer(candidate_signature, dtype=np.uint32))
+            if score >= threshold and meaning_tokens(content) == meaning:
+                return phrase_id, score
+    return None
+
+
+def record_merge(conn, kept_id, row, score, added_sources, merged_from_id=None):
+    """Log a merge of phrase `row` (a dict) into kept_id."""
+    conn.execute(
+        f"INSERT INTO {MERGES_TABLE} (kept_id, merged_from_id, source, added_sources, "
+        f"similarity, merged_at, row) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (kept_id, merged_from_id, row.get("Source_File") or "", added_sources, round(score, 3),
+         datetime.now().isoformat(timespec="seconds"), json.dumps(row, ensure_ascii=False))
+    )
+
+
+def undo_merge(conn, phrases_table, merge_id):
+    """
+    Restore a merged phrase as a row of its own and take the sources the merge
+    added out of the kept phrase's provenance list (deleting the kept phrase
+    if that leaves it without a source). The restored row is not
+    indexed, so later inserts won't merge into it until the next full dedup.
+
+    Returns:
+        id of the restored phrase, or None if there is no such merge
+    """
+    found = conn.execute(
+        f"SELECT kept_id, added_sources, row FROM {MERGES_TABLE} WHERE id = ?", (merge_id,)
+    ).fetchone()
+    if found is None:
+        return None
+    kept_id, added_sources, row_json = found
+    row = json.loads(row_json)
+    with conn:
+        columns = ", ".join(f'"{col}"' for col in row)
+        placeholders = ", ".join("?" for _ in row)
+        phrase_id = conn.execute(
+            f'INSERT INTO "{phrases_table}" ({columns}) VALUES ({placeholders})',
+            tuple(row.values())
+        ).lastrowid
+        if added_sources:
+            (existing,) = conn.execute(
+                f'SELECT "Source_File" FROM "{phrases_table}" WHERE id = ?', (kept_id,)
+            ).fetchone()
+            remaining = remove_sources(existing, added_sources)
+            if remaining:
+                conn.execute(
+                    f'UPDATE "{phrases_table}" SET "Source_File" = ? WHERE id = ?',
+                    (remaining, kept_id)
+                )
+            else:
+                # Its own sources were re-mined away; the restored row replaces it
+                conn.execute(f'DELETE FROM "{phrases_table}" WHERE id = ?', (kept_id,))
+        conn.execute(f"DELETE FROM {MERGES_TABLE} WHERE id = ?", (merge_id,))
+    return phrase_id
+
+
+def index_phrase(conn, phrase_id, signature):
+    """Record a phrase's signature and LSH buckets."""
+    conn.execute(
+        f"INSERT OR REPLACE INTO {SIGNATURE_TABLE} (phrase_id, signature) VALUES (?, ?)",
+        (phrase_id, signature.tobytes())
+    )
+    conn.executemany(
+        f"INSERT INTO {LSH_TABLE} (band, bucket, phrase_id) VALUES (?, ?, ?)",
+        [(band, bucket, phrase_id) for band, bucket in enumerate(band_buckets(signature))]
+    )
+
+
+def dedupe_store(conn, phrases_table, threshold=DEDUP_THRESHOLD, dry_run=False):
+    """
+    Batch job: rebuild the signature index for every phrase and merge near
+    duplicates (same group, negations and numbers; see find_duplicate) into
+    the earliest copy, keeping all Source_File values and logging each merge.
+
+    Works in memory with LSH buckets, so it is sub-quadratic in library size.
+
+    Returns:
+        (phrases_scanned, duplicates_merged)
+    """
+    buckets = {}
+    signatures = {}
+    meanings = {}
+    keep_sources = {}
+    merged_into = {}   # merged phrase id -> (kept id, similarity, sources added)
+
+    group_columns = "".join(f', "{col}"' for col in DEDUP_GROUP_COLUMNS)
+    rows = conn.execute(
+        f'SELECT id, "Content", "Source_File"{group_columns} FROM "{phrases_table}" ORDER BY id'
+    )
+    scanned = 0
+    for phrase_id, content, source, *group in rows:
+        scanned += 1
+        signature = minhash(content)
+        meaning = meaning_tokens(content)
+        keys = [(tuple(group), band, bucket) for band, bucket in enumerate(band_buckets(signature))]
+
+        duplicate_of = None
+        seen = set()
+        for key in keys:
+            for candidate in buckets.get(key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                score = similarity(signature, signatures[candidate])
+                if score >= threshold and meanings[candidate] == meaning:
+                    duplicate_of = candidate
+                    break
+            if duplicate_of is not None:
+                break
+
+        if duplicate_of is not None:
+            before = keep_sources[duplicate_of]
+            keep_sources[duplicate_of] = merge_sources(before, source)
+            added = remove_sources(keep_sources[duplicate_of], before)
+            merged_into[phrase_id] = (duplicate_of, score, added)
+            continue
+
+        signatures[phrase_id] = signature
+        meanings[phrase_id] = meaning
+        keep_sources[phrase_id] = source
+        for key in keys:
+            buckets.setdefault(key, []).append(phrase_id)
+
+    if dry_run:
+        return scanned, len(merged_into)
+
+    with conn:
+        for phrase_id, (kept_id, score, added) in merged_into.items():
+            cursor = conn.execute(f'SELECT * FROM "{phrases_table}" WHERE id = ?', (phrase_id,))
+            names = [d[0] for d in cursor.description]
+            row = {k: v for k, v in zip(names, cursor.fetchone()) if k != "id"}
+            record_merge(conn, kept_id, row, score, added, merged_from_id=phrase_id)
+        # Earlier merges into a phrase merged now move to the phrase that
+        # absorbed it, so the delete trigger doesn't drop their history
+        conn.executemany(
+            f"UPDATE {MERGES_TABLE} SET kept_id = ? WHERE kept_id = ?",
+            [(kept_id, phrase_id) for phrase_id, (kept_id, _, _) in merged_into.items()]
+        )
+        conn.executemany(
+            f'DELETE FROM "{phrases_table}" WHERE id = ?',
+            [(phrase_id,) for phrase_id in merged_into]
+        )
+        updated = {kept_id for kept_id, _, _ in merged_into.values()}
+        conn.executemany(
+            f'UPDATE "{phrases_table}" SET "Source_File" = ? WHERE id = ?',
+            [(keep_sources[phrase_id], phrase_id) for phrase_id in updated]
+        )
+        conn.execute(f"DELETE FROM {SIGNATURE_TABLE}")
+        conn.execute(f"DELETE FROM {LSH_TABLE}")
+        conn.executemany(
+            f"INSERT INTO {SIGNATURE_TABLE} (phrase_id, signature) VALUES (?, ?)",
+            [(phrase_id, sig.tobytes()) for phrase_id, sig in signatures.items()]
+        )
+        conn.executemany(
+            f"INSERT INTO {LSH_TABLE} (band, bucket, phrase_id) VALUES (?, ?, ?)",
+            [(band, bucket, phrase_id)
+             for (_, band, bucket), ids in buckets.items() for phrase_id in ids]
+        )
+
+    return scanned, len(merged_into)
+
+
+def main():
+    import phrase_store
+    from config import STORE_TABLE_NAME
+
+    parser = argparse.ArgumentParser(description="Merge near-duplicate phrases in the phrase store.")
+    parser.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD,
+                        help=f"Similarity threshold (default: {DEDUP_THRESHOLD})")
+    parser.add_argument("--dry-run", action="store_true", help="Report only, change nothing")
+    parser.add_argument("--merges", action="store_true", help="List logged merges")
+    parser.add_argument("--undo", type=int, metavar="ID", help="Undo a logged merge")
+    args = parser.parse_args()
+
+    conn = phrase_store.connect()
+    try:
+        if args.merges:
+            merges = conn.execute(
+                f"SELECT m.id, m.merged_at, m.similarity, m.source, m.row, p.\"Content\" "
+                f"FROM {MERGES_TABLE} m JOIN \"{STORE_TABLE_NAME}\" p ON p.id = m.kept_id "
+                f"ORDER BY m.id"
+            ).fetchall()
+            print(f"{len(merges)} logged merge(s)")
+            for merge_id, merged_at, score, source, row, kept in merges:
+                print(f"  [{merge_id}] {merged_at}  {score:.2f}  {source}")
+                print(f"      merged: {json.loads(row).get('Content', '')[:100]}")
+                print(f"      kept:   {kept[:100]}")
+            return 0
+        if args.undo is not None:
+            phrase_id = undo_merge(conn, STORE_TABLE_NAME, args.undo)
+            if phrase_id is None:
+                print(f"No merge {args.undo} in the log")
+                return 1
+            print(f"✓ Restored the merged phrase as [{phrase_id}]")
+            return 0
+        scanned, merged = dedupe_store(conn, STORE_TABLE_NAME, args.threshold, args.dry_run)
+    finally:
+        conn.close()
+
+    action = "found" if args.dry_run else "merged"
+    print(f"✓ Scanned {scanned} phrases, {action} {merged} near-duplicates")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
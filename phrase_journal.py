@@ -0,0 +1,178 @@
+"""
+Phrase Journal
+Append-only write-ahead journal in front of the phrase store.
+
+2_import_word_docs.py and 4_mine_reports.py append each finished file's
+phrases (and, for the miner, its manifest entry) as one JSON line. An append
+costs the same however large the library is, and a finished report is on
+disk immediately. compact() then applies everything in the journal to the
+store in a single transaction and refreshes the Excel export once.
+
+Crash safety: an incomplete last line is ignored, and a journal segment that
+was already committed is recognised by name and never applied twice. The
+miner compacts leftovers at start-up, so its manifest is always complete.
+
+Run:
+    python phrase_journal.py status    # Pending entries and phrases
+    python phrase_journal.py compact   # Apply the journal to the store now
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from datetime import datetime
+from config import STORE_JOURNAL_FILE, MASTER_DB_FILE
+import phrase_store
+import phrase_validate
+
+SEGMENT_SUFFIX = ".compacting"
+COMPACTED_TABLE_NAME = "compacted_journals"
+
+
+def append(rows, reports=(), replace_sources=(), path=STORE_JOURNAL_FILE):
+    """
+    Append one entry (see phrase_store.insert_phrases for the arguments) and
+    flush it to disk.
+    """
+    entry = {
+        "rows": list(rows),
+        "reports": list(reports),
+        "replace_sources": list(replace_sources),
+    }
+    line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_entries(path):
+    """Entries in a journal file, in order. Incomplete lines are skipped."""
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue  # Torn write from an interrupted run
+    return entries
+
+
+def _segments(path):
+    return sorted(glob.glob(glob.escape(path) + ".*" + SEGMENT_SUFFIX))
+
+
+def pending_files(path=STORE_JOURNAL_FILE):
+    """Journal files not yet applied to the store (oldest first)."""
+    files = _segments(path)
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        files.append(path)
+    return files
+
+
+def compact(conn=None, path=STORE_JOURNAL_FILE, export_file=MASTER_DB_FILE):
+    """
+    Apply the journal to the store in one transaction, then refresh the
+    Excel export (if the workbook exists and any phrases changed).
+
+    The live journal is first renamed to a segment, so appends made while
+    compacting go to a fresh journal.
+
+    Returns:
+        dict with "entries", "inserted", "merged" and "rejected" counts, and
+        "exported" (whether the Excel export was refreshed)
+    """
+    totals = {"entries": 0, "inserted": 0, "merged": 0, "rejected": 0, "exported": False}
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        os.replace(path, f"{path}.{time.time_ns()}-{os.getpid()}{SEGMENT_SUFFIX}")
+    segments = _segments(path)
+    if not segments:
+        return totals
+
+    own_conn = conn is None
+    if own_conn:
+        conn = phrase_store.connect()
+
+    try:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {COMPACTED_TABLE_NAME} (
+                segment TEXT PRIMARY KEY,
+                compacted_at TEXT NOT NULL
+            )
+        """)
+        changed = False
+        rejected_rows = []
+
+        with conn:
+            # Take the write lock before reading which segments are done, so a
+            # compaction running at the same time (importer and miner) can't
+            # apply the same segment twice
+            conn.execute("BEGIN IMMEDIATE")
+            done = {name for (name,) in conn.execute(f"SELECT segment FROM {COMPACTED_TABLE_NAME}")}
+            for segment in segments:
+                name = os.path.basename(segment)
+                if name in done or not os.path.exists(segment):
+                    continue  # Committed by another compaction or before a crash
+                for entry in read_entries(segment):
+                    changed = changed or bool(entry["rows"] or entry["replace_sources"])
+                    inserted, merged, rejected = phrase_store.write_phrases(
+                        conn, entry["rows"], entry["reports"], entry["replace_sources"]
+                    )
+                    totals["entries"] += 1
+                    totals["inserted"] += inserted
+                    totals["merged"] += merged
+                    totals["rejected"] += len(rejected)
+                    rejected_rows.extend(rejected)
+                conn.execute(
+                    f"INSERT INTO {COMPACTED_TABLE_NAME} (segment, compacted_at) VALUES (?, ?)",
+                    (name, datetime.now().isoformat(timespec="seconds"))
+                )
+
+        # Only once committed, so a rolled-back compaction that is retried
+        # doesn't report the same rejections twice
+        phrase_validate.write_rejections(rejected_rows)
+
+        for segment in segments:
+            try:
+                os.remove(segment)
+            except FileNotFoundError:
+                pass  # Removed by the other compaction
+
+        if export_file and changed and os.path.exists(export_file):
+            phrase_store.export_to_excel(export_file, conn=conn)
+            totals["exported"] = True
+    finally:
+        if own_conn:
+            conn.close()
+
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or compact the phrase store journal.")
+    parser.add_argument("command", choices=["status", "compact"])
+    parser.add_argument("--journal", default=STORE_JOURNAL_FILE, help="Journal path")
+    parser.add_argument("--excel", default=MASTER_DB_FILE, help="Excel workbook to refresh")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        files = pending_files(args.journal)
+        entries = [e for f in files for e in read_entries(f)]
+        print(f"Journal: {os.path.abspath(args.journal)}")
+        print(f"Pending: {len(entries)} entries, "
+              f"{sum(len(e['rows']) for e in entries)} phrases in {len(files)} file(s)")
+
+    elif args.command == "compact":
+        totals = compact(path=args.journal, export_file=args.excel)
+        print(f"✓ Applied {totals['entries']} journal entries: {totals['inserted']} phrases "
+              f"inserted, {totals['merged']} near-duplicates merged, "
+              f"{totals['rejected']} rejected")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,665 @@
+"""
+Phrase Store
+SQLite-backed storage for the Phrase Library.
+
+Every script appends to and reads from this store instead of reopening and
+rewriting the whole Excel workbook. Inserts are transactional bulk inserts, so
+an append costs O(new rows) regardless of library size. A full-text index
+(SQLite FTS5) over SEARCH_COLUMNS is kept in sync by triggers, and
+near-duplicate phrases are merged on insert (phrase_dedup.py). The Excel workbook
+(Master_Phrase_Library.xlsx) is regenerated from the store as an export.
+
+Run:
+    python phrase_store.py stats           # Show row counts
+    python phrase_store.py search "damp"   # Ranked full-text search
+    python phrase_store.py reindex         # Rebuild the full-text search index
+    python phrase_store.py manifest        # List reports mined by 4_mine_reports.py
+    python phrase_store.py export          # Regenerate the Excel workbook
+    python phrase_store.py import-excel    # Migrate rows from an existing workbook
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from config import (
+    STORE_DB_FILE,
+    STORE_TABLE_NAME,
+    MANIFEST_TABLE_NAME,
+    STANDARD_COLUMNS,
+    INDEXED_COLUMNS,
+    SEARCH_COLUMNS,
+    STORE_SNAPSHOT_FILE,
+    CATEGORICAL_COLUMNS,
+    COLUMN_DOMAINS,
+    DEDUP_ON_INSERT,
+    SOURCE_FILE_SEPARATOR,
+    VALIDATE_ON_INSERT,
+    MASTER_DB_FILE,
+    MASTER_DB_SHEET_NAME,
+)
+import phrase_dedup
+import phrase_validate
+
+
+def _quote(identifier):
+    """Quote a column/table name for use in SQL."""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _clean_value(value):
+    """Normalise a cell value to the TEXT representation used by the store."""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if value != value:  # NaN from pandas
+            return ""
+        if value.is_integer():
+            return str(int(value))
+    return str(value).strip()
+
+
+def init_schema(conn):
+    """Create the phrases table and its indexes if they don't exist."""
+    column_defs = ",\n    ".join(
+        f"{_quote(col)} TEXT NOT NULL DEFAULT ''" for col in STANDARD_COLUMNS
+    )
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {_quote(STORE_TABLE_NAME)} (
+            id INTEGER PRIMARY KEY,
+            {column_defs}
+        )
+    """)
+    for col in INDEXED_COLUMNS:
+        index_name = f"idx_{STORE_TABLE_NAME}_{col.lower()}"
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {_quote(index_name)} "
+            f"ON {_quote(STORE_TABLE_NAME)} ({_quote(col)})"
+        )
+    _init_search_index(conn)
+    phrase_dedup.init_schema(conn, STORE_TABLE_NAME)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {_quote(MANIFEST_TABLE_NAME)} (
+            file_hash TEXT PRIMARY KEY,
+            file_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            phrase_count INTEGER NOT NULL DEFAULT 0,
+            mined_at TEXT NOT NULL,
+            model TEXT NOT NULL DEFAULT '',
+            error TEXT NOT NULL DEFAULT '',
+            batch_id TEXT NOT NULL DEFAULT '',
+            batch_keys TEXT NOT NULL DEFAULT ''
+        )
+    """)
+    # Stores created before batch mining have no batch columns. batch_keys is
+    # a JSON list of the response-cache key of each of the report's requests.
+    manifest_columns = {row[1] for row in conn.execute(
+        f"PRAGMA table_info({_quote(MANIFEST_TABLE_NAME)})"
+    )}
+    for column in ("batch_id", "batch_keys"):
+        if column not in manifest_columns:
+            conn.execute(
+                f"ALTER TABLE {_quote(MANIFEST_TABLE_NAME)} "
+                f"ADD COLUMN {column} TEXT NOT NULL DEFAULT ''"
+            )
+    conn.commit()
+
+
+# ============================================================================
+# FULL-TEXT SEARCH
+# ============================================================================
+
+SEARCH_TABLE_NAME = f"{STORE_TABLE_NAME}_fts"
+
+# Quoted phrases ("rising damp") or bare terms (chimn)
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _init_search_index(conn):
+    """
+    Create the FTS5 index over SEARCH_COLUMNS and the triggers that update it
+    incrementally. The index is an external-content table, so phrase text is
+    not stored twice.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (SEARCH_TABLE_NAME,)
+    ).fetchone()
+
+    fts = _quote(SEARCH_TABLE_NAME)
+    table = _quote(STORE_TABLE_NAME)
+    columns = ", ".join(_quote(col) for col in SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{_quote(col)}" for col in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{_quote(col)}" for col in SEARCH_COLUMNS)
+
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {columns},
+            content={table},
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {_quote(SEARCH_TABLE_NAME + '_ai')}
+        AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {_quote(SEARCH_TABLE_NAME + '_ad')}
+        AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {_quote(SEARCH_TABLE_NAME + '_au')}
+        AFTER UPDATE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts} (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    """)
+
+    if not exists:
+        # Index any phrases written before the search index existed
+        rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn):
+    """Rebuild the full-text index from the phrases table."""
+    fts = _quote(SEARCH_TABLE_NAME)
+    conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+    conn.commit()
+
+
+def build_match_query(query):
+    """
+    Translate a dashboard search string into an FTS5 MATCH expression.
+
+    - "quoted text" is matched as an exact phrase
+    - bare words are prefix-matched (chimn -> chimney, chimneys)
+    - all parts must match (implicit AND)
+
+    Returns None if the query contains no searchable words.
+    """
+    parts = []
+    for phrase, term in _QUERY_TOKEN.findall(query or ""):
+        if phrase:
+            words = _WORD.findall(phrase)
+            if words:
+                parts.append('"' + " ".join(words) + '"')
+        else:
+            for word in _WORD.findall(term):
+                parts.append(f'"{word}"*')
+    return " ".join(parts) if parts else None
+
+
+def search_phrases(conn, query, limit=None):
+    """
+    Ranked full-text search over SEARCH_COLUMNS.
+
+    Args:
+        conn: open store connection
+        query: search string (supports "exact phrases" and word prefixes)
+        limit: maximum number of ids to return (None: every match; the
+            dashboard needs them all for its counts, pages and exports)
+
+    Returns:
+        List of phrase ids, best (lowest BM25) first
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+    fts = _quote(SEARCH_TABLE_NAME)
+    rows = conn.execute(
+        f"SELECT rowid FROM {fts} WHERE {fts} MATCH ? ORDER BY rank LIMIT ?",
+        (match, -1 if limit is None else limit)
+    )
+    return [row[0] for row in rows]
+
+
+def connect(db_path=STORE_DB_FILE):
+    """Open the phrase store, creating the schema on first use."""
+    conn = sqlite3.connect(db_path)
+    # WAL lets the dashboard read while the importer/miner write
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    init_schema(conn)
+    return conn
+
+
+def insert_phrases(rows, conn=None, reports=(), replace_sources=(), dedup=DEDUP_ON_INSERT,
+                   validate=VALIDATE_ON_INSERT, stats=None):
+    """
+    Append phrase rows to the store in a single transaction.
+
+    Args:
+        rows: iterable of dicts keyed by STANDARD_COLUMNS (missing keys -> "")
+        conn: optional open connection (one is opened and closed otherwise)
+        reports: mining manifest entries (see record_reports) written in the
+            same transaction, so a report is only marked mined once its
+            phrases are committed
+        replace_sources: Source_File values whose existing phrases are
+            replaced (used when re-mining a report): each is taken out of
+            every provenance list, and phrases left with no source deleted
+        dedup: merge near-duplicates of existing (or earlier new) phrases
+            into them instead of inserting (see phrase_dedup.py)
+        validate: normalise rows and reject invalid ones first (see
+            phrase_validate.py); rejected rows go to the rejection report
+        stats: optional dict, filled with "inserted", "merged" and "rejected"
+            counts
+
+    Returns:
+        Number of rows inserted
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = connect()
+
+    try:
+        with conn:
+            inserted, merged, rejected_rows = write_phrases(
+                conn, rows, reports, replace_sources, dedup, validate
+            )
+    finally:
+        if own_conn:
+            conn.close()
+    phrase_validate.write_rejections(rejected_rows)
+
+    if stats is not None:
+        stats["inserted"] = inserted
+        stats["merged"] = merged
+        stats["rejected"] = len(rejected_rows)
+    return inserted
+
+
+def write_phrases(conn, rows, reports=(), replace_sources=(), dedup=DEDUP_ON_INSERT,
+                  validate=VALIDATE_ON_INSERT):
+    """
+    insert_phrases without the transaction, for callers that apply several
+    writes atomically (see phrase_journal.compact). Rejected rows are
+    returned rather than reported: the caller writes them to the rejection
+    report once the transaction commits, so a rollback and retry doesn't
+    report them twice.
+
+    Returns:
+        (inserted, merged, rejected_rows)
+    """
+    rejected_rows = []
+    if validate:
+        rows, rejected_rows, _ = phrase_validate.validate_rows(rows)
+    values = [
+        tuple(_clean_value(row.get(col)) for col in STANDARD_COLUMNS)
+        for row in rows
+    ]
+    columns = ", ".join(_quote(col) for col in STANDARD_COLUMNS)
+    placeholders = ", ".join("?" for _ in STANDARD_COLUMNS)
+    insert_sql = f"INSERT INTO {_quote(STORE_TABLE_NAME)} ({columns}) VALUES ({placeholders})"
+    content_idx = STANDARD_COLUMNS.index("Content")
+    source_idx = STANDARD_COLUMNS.index("Source_File")
+
+    inserted = 0
+    merged = 0
+    if replace_sources:
+        _remove_sources(conn, replace_sources)
+    if not dedup:
+        conn.executemany(insert_sql, values)
+        inserted = len(values)
+    else:
+        for value in values:
+            row = dict(zip(STANDARD_COLUMNS, value))
+            signature = phrase_dedup.minhash(value[content_idx])
+            duplicate = phrase_dedup.find_duplicate(conn, STORE_TABLE_NAME, signature, row)
+            if duplicate is None:
+                phrase_id = conn.execute(insert_sql, value).lastrowid
+                phrase_dedup.index_phrase(conn, phrase_id, signature)
+                inserted += 1
+            else:
+                duplicate_id, score = duplicate
+                added = _add_source(conn, duplicate_id, value[source_idx])
+                if added:
+                    # Nothing to undo when the source was already listed
+                    # (e.g. an unchanged file imported again)
+                    phrase_dedup.record_merge(conn, duplicate_id, row, score, added)
+                merged += 1
+    if reports:
+        _upsert_reports(conn, reports)
+    return inserted, merged, rejected_rows
+
+
+def _remove_sources(conn, sources):
+    """
+    Take each source out of every provenance list that has it (see
+    phrase_dedup.merge_sources), deleting a phrase only when no other source
+    remains, and drop the merge-log entries for those sources.
+    """
+    table = _quote(STORE_TABLE_NAME)
+    sf = _quote("Source_File")
+    separator = SOURCE_FILE_SEPARATOR
+    for source in sources:
+        rows = conn.execute(
+            f"SELECT id, {sf} FROM {table} WHERE instr(? || {sf} || ?, ?) > 0",
+            (separator, separator, f"{separator}{source}{separator}")
+        ).fetchall()
+        deleted = []
+        updated = []
+        for phrase_id, existing in rows:
+            remaining = phrase_dedup.remove_sources(existing, source)
+            if remaining:
+                updated.append((remaining, phrase_id))
+            else:
+                deleted.append((phrase_id,))
+        conn.executemany(f"DELETE FROM {table} WHERE id = ?", deleted)
+        conn.executemany(f"UPDATE {table} SET {sf} = ? WHERE id = ?", updated)
+        conn.executemany(
+            f"DELETE FROM {phrase_dedup.MERGES_TABLE} WHERE kept_id = ? AND source = ?",
+            [(phrase_id, source) for _, phrase_id in updated]
+        )
+
+
+def _add_source(conn, phrase_id, source):
+    """
+    Add a Source_File to an existing phrase's provenance list; returns the
+    source(s) actually added ("" if already listed).
+    """
+    if not source:
+        return ""
+    sf = _quote("Source_File")
+    (existing,) = conn.execute(
+        f"SELECT {sf} FROM {_quote(STORE_TABLE_NAME)} WHERE id = ?", (phrase_id,)
+    ).fetchone()
+    combined = phrase_dedup.merge_sources(existing, source)
+    if combined != existing:
+        conn.execute(
+            f"UPDATE {_quote(STORE_TABLE_NAME)} SET {sf} = ? WHERE id = ?", (combined, phrase_id)
+        )
+    return phrase_dedup.remove_sources(combined, existing)
+
+
+# ============================================================================
+# MINING MANIFEST
+# ============================================================================
+
+MANIFEST_FIELDS = [
+    "file_hash", "file_name", "status", "phrase_count", "mined_at", "model", "error", "batch_id",
+    "batch_keys",
+]
+
+
+def _upsert_reports(conn, reports):
+    placeholders = ", ".join("?" for _ in MANIFEST_FIELDS)
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {_quote(MANIFEST_TABLE_NAME)} "
+        f"({', '.join(MANIFEST_FIELDS)}) VALUES ({placeholders})",
+        [tuple(report.get(field, "") for field in MANIFEST_FIELDS) for report in reports]
+    )
+
+
+def record_reports(conn, reports):
+    """
+    Record mining manifest entries without inserting phrases (e.g. failures).
+
+    Each entry is a dict with file_hash, file_name, status, phrase_count,
+    mined_at, model and (optionally) error, batch_id and batch_keys.
+    """
+    with conn:
+        _upsert_reports(conn, reports)
+
+
+def load_manifest(conn):
+    """Return the mining manifest as {file_hash: entry dict}."""
+    rows = conn.execute(
+        f"SELECT {', '.join(MANIFEST_FIELDS)} FROM {_quote(MANIFEST_TABLE_NAME)}"
+    )
+    return {row[0]: dict(zip(MANIFEST_FIELDS, row)) for row in rows}
+
+
+def count_phrases(conn, section=None):
+    """Return the number of phrases, optionally for one Section."""
+    sql = f"SELECT COUNT(*) FROM {_quote(STORE_TABLE_NAME)}"
+    params = ()
+    if section is not None:
+        sql += f" WHERE {_quote('Section')} = ?"
+        params = (section,)
+    return conn.execute(sql, params).fetchone()[0]
+
+
+def iter_rows(conn, section=None, with_ids=False):
+    """
+    Yield phrase rows as tuples in STANDARD_COLUMNS order (insertion order).
+    With with_ids=True each tuple starts with the phrase id.
+    """
+    columns = ", ".join(_quote(col) for col in STANDARD_COLUMNS)
+    if with_ids:
+        columns = "id, " + columns
+    sql = f"SELECT {columns} FROM {_quote(STORE_TABLE_NAME)}"
+    params = ()
+    if section is not None:
+        sql += f" WHERE {_quote('Section')} = ?"
+        params = (section,)
+    sql += " ORDER BY id"
+    yield from conn.execute(sql, params)
+
+
+def _string_dtype():
+    """Arrow-backed strings (one contiguous buffer) when pyarrow is installed."""
+    try:
+        import pyarrow  # noqa: F401
+        return "string[pyarrow]"
+    except ImportError:
+        return object
+
+
+def _typed_column(col, values):
+    import pandas as pd
+    if col in CATEGORICAL_COLUMNS:
+        domain = [str(v) for v in COLUMN_DOMAINS.get(col, [])]
+        extra = sorted(set(values).difference(domain))
+        return pd.Categorical(values, categories=domain + extra)
+    return pd.array(values, dtype=_string_dtype())
+
+
+def load_frame(conn):
+    """
+    Load the whole phrase table as a compact DataFrame, indexed by id.
+
+    CATEGORICAL_COLUMNS become categoricals (ordered as in COLUMN_DOMAINS)
+    and the remaining columns Arrow strings. Columns are read one at a time
+    within a single read transaction, so only one column of Python strings
+    exists while loading and every column sees the same snapshot.
+    """
+    import numpy as np
+    import pandas as pd
+
+    table = _quote(STORE_TABLE_NAME)
+    conn.execute("BEGIN")
+    try:
+        ids = np.fromiter(
+            (row[0] for row in conn.execute(f"SELECT id FROM {table} ORDER BY id")),
+            dtype=np.int64
+        )
+        columns = {}
+        for col in STANDARD_COLUMNS:
+            values = [row[0] for row in conn.execute(f"SELECT {_quote(col)} FROM {table} ORDER BY id")]
+            columns[col] = _typed_column(col, values)
+    finally:
+        conn.commit()
+    return pd.DataFrame(columns, index=pd.Index(ids, name="id"))
+
+
+def store_signature(db_path=STORE_DB_FILE):
+    """
+    Return the (mtime, size) of the store and its WAL file. The signature
+    changes whenever phrases are written, so it can be used as a cache key.
+    """
+    signature = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+# Bump when load_frame's column types change, so old snapshots are rebuilt
+SNAPSHOT_FORMAT = 2
+
+
+def load_frame_snapshot(db_path=STORE_DB_FILE, snapshot_path=STORE_SNAPSHOT_FILE):
+    """
+    Load the phrase table, reusing the Parquet snapshot when it matches the
+    store's current signature and refreshing it otherwise.
+
+    Falls back to reading the store directly if pyarrow is not installed.
+    """
+    import pandas as pd
+
+    signature = store_signature(db_path)
+    meta_path = snapshot_path + ".json"
+
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if (meta.get("signature") == json.loads(json.dumps(signature))
+                and meta.get("format") == SNAPSHOT_FORMAT):
+            return pd.read_parquet(snapshot_path)
+    except (OSError, ValueError, ImportError):
+        pass  # Missing, stale or unreadable snapshot - rebuild below
+
+    conn = connect(db_path)
+    try:
+        df = load_frame(conn)
+    finally:
+        conn.close()
+
+    # Write the snapshot atomically; it is tagged with the signature taken
+    # before loading, so a concurrent write simply invalidates it again.
+    try:
+        df.to_parquet(snapshot_path + ".tmp", index=True)
+        os.replace(snapshot_path + ".tmp", snapshot_path)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"signature": signature, "format": SNAPSHOT_FORMAT}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+    except (OSError, ImportError, ValueError):
+        pass  # Snapshot is an optimisation only
+
+    return df
+
+
+def export_to_excel(output_file=MASTER_DB_FILE, conn=None):
+    """
+    Regenerate the Excel workbook from the store.
+
+    Every phrase is written to the Master sheet, and phrases whose Section
+    is one of SECTIONS are also written to that sheet. The workbook is
+    streamed in write-only mode (see excel_export.py), with the header
+    formatting and validation from 1_setup_database.py.
+
+    Returns:
+        Number of rows written to the Master sheet
+    """
+    import excel_export
+
+    own_conn = conn is None
+    if own_conn:
+        conn = connect()
+
+    try:
+        return excel_export.write_workbook(iter_rows(conn), output_file)
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def import_from_excel(input_file=MASTER_DB_FILE, conn=None):
+    """
+    Copy the Master sheet of an existing workbook into the store.
+
+    Returns:
+        Number of rows imported
+    """
+    import pandas as pd
+
+    df = pd.read_excel(input_file, sheet_name=MASTER_DB_SHEET_NAME)
+    df = df.reindex(columns=STANDARD_COLUMNS)
+    return insert_phrases(df.to_dict("records"), conn=conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the SQLite phrase store.")
+    parser.add_argument(
+        "command",
+        choices=["stats", "search", "reindex", "manifest", "export", "import-excel"],
+        help="stats: show counts | search: full-text search | "
+             "manifest: list mined reports | "
+             "reindex: rebuild the search index | export: rewrite the Excel workbook | "
+             "import-excel: migrate an existing workbook into the store"
+    )
+    parser.add_argument("query", nargs="?", default="", help="Search text (for 'search')")
+    parser.add_argument("--limit", type=int, default=20, help="Max search results to show")
+    parser.add_argument("--db", default=STORE_DB_FILE, help="Phrase store path")
+    parser.add_argument("--excel", default=MASTER_DB_FILE, help="Excel workbook path")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    try:
+        if args.command == "stats":
+            print(f"Phrase store: {os.path.abspath(args.db)}")
+            print(f"Total phrases: {count_phrases(conn)}")
+            for (section, count) in conn.execute(
+                f"SELECT {_quote('Section')}, COUNT(*) FROM {_quote(STORE_TABLE_NAME)} "
+                f"GROUP BY {_quote('Section')} ORDER BY {_quote('Section')}"
+            ):
+                print(f"  {section or '(blank)'}: {count}")
+
+        elif args.command == "search":
+            start = time.perf_counter()
+            ids = search_phrases(conn, args.query, limit=args.limit)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            print(f"{len(ids)} result(s) for {args.query!r} in {elapsed_ms:.1f} ms")
+            content_idx = STANDARD_COLUMNS.index("Content")
+            for phrase_id in ids:
+                row = conn.execute(
+                    f"SELECT * FROM {_quote(STORE_TABLE_NAME)} WHERE id = ?", (phrase_id,)
+                ).fetchone()
+                print(f"  [{phrase_id}] {row[1 + content_idx][:100]}")
+
+        elif args.command == "manifest":
+            entries = sorted(load_manifest(conn).values(), key=lambda e: e["mined_at"])
+            print(f"{len(entries)} report(s) in the mining manifest")
+            for e in entries:
+                line = f"  {e['mined_at']}  {e['status']:<7} {e['phrase_count']:>5}  {e['file_name']}"
+                if e["status"] == "batched":
+                    line += f"  (batch {e['batch_id']})"
+                if e["error"]:
+                    line += f"  ({e['error']})"
+                print(line)
+
+        elif args.command == "reindex":
+            rebuild_search_index(conn)
+            print("✓ Search index rebuilt")
+
+        elif args.command == "export":
+            written = export_to_excel(args.excel, conn=conn)
+            print(f"✓ Exported {written} phrases to {args.excel}")
+
+        elif args.command == "import-excel":
+            if not os.path.exists(args.excel):
+                print(f"Error: {args.excel} not found.")
+                return 1
+            imported = import_from_excel(args.excel, conn=conn)
+            print(f"✓ Imported {imported} phrases from {args.excel}")
+    finally:
+        conn.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
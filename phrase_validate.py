@@ -0,0 +1,197 @@
+"""
+Phrase Validation
+Batch validation and normalisation of phrase rows before they are stored.
+
+phrase_store.write_phrases passes every batch through validate_rows (when
+VALIDATE_ON_INSERT is set), so rows from the importer, the miner's JSON and
+Excel migrations all meet the same rules:
+
+- whitespace in every column is collapsed
+- Content must be MIN_CONTENT_LENGTH to MAX_CONTENT_LENGTH characters
+- columns with a domain in COLUMN_DOMAINS are mapped onto it: exact values,
+  VALUE_ALIASES, then a case/punctuation-insensitive and fuzzy match
+  ("semi detached" -> "Semi-Detached"); DOMAIN_WILDCARDS are always allowed
+- values that still don't fit are cleared, or the row is rejected when
+  REJECT_UNKNOWN_DOMAIN_VALUES is set
+
+Checks run over the whole batch at once with pandas, and each distinct
+value is mapped only once, so the cost depends on the number of distinct
+values rather than rows. Rejected rows are appended to REJECTION_REPORT_FILE.
+
+Run:
+    python phrase_validate.py           # Summarise the rejection report
+    python phrase_validate.py --check   # Validate rows already in the store (read-only)
+"""
+
+import os
+import re
+import sys
+import json
+import difflib
+import argparse
+from collections import Counter
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from config import (
+    STANDARD_COLUMNS,
+    COLUMN_DOMAINS,
+    DOMAIN_WILDCARDS,
+    VALUE_ALIASES,
+    FUZZY_MATCH_CUTOFF,
+    REJECT_UNKNOWN_DOMAIN_VALUES,
+    MIN_CONTENT_LENGTH,
+    MAX_CONTENT_LENGTH,
+    REJECTION_REPORT_FILE,
+)
+
+_KEY = re.compile(r"[^a-z0-9]+")
+
+
+def _key(value):
+    """Comparison key: lowercase letters and digits only."""
+    return _KEY.sub("", value.lower())
+
+
+def _domain_lookup(col):
+    """{key: canonical value} for a domain column, including aliases and wildcards."""
+    lookup = {}
+    for value in COLUMN_DOMAINS[col]:
+        lookup[_key(str(value))] = str(value)
+    for alias, value in VALUE_ALIASES.get(col, {}).items():
+        lookup[_key(alias)] = str(value)
+    for wildcard in DOMAIN_WILDCARDS:
+        lookup[_key(wildcard)] = wildcard
+    return lookup
+
+
+_LOOKUPS = {col: _domain_lookup(col) for col in COLUMN_DOMAINS if col in STANDARD_COLUMNS}
+_VALID = {
+    col: {str(v) for v in COLUMN_DOMAINS[col]} | set(DOMAIN_WILDCARDS)
+    for col in _LOOKUPS
+}
+
+
+def map_value(col, value):
+    """Canonical domain value for `value` in column `col`, or None if there is none."""
+    if value in _VALID[col]:
+        return value
+    try:
+        number = float(value)
+        if number.is_integer():
+            value = str(int(number))  # "2.0" -> "2"
+    except ValueError:
+        pass
+    lookup = _LOOKUPS[col]
+    key = _key(value)
+    if key in lookup:
+        return lookup[key]
+    match = difflib.get_close_matches(key, list(lookup), n=1, cutoff=FUZZY_MATCH_CUTOFF)
+    return lookup[match[0]] if match else None
+
+
+def _records(df):
+    """Row dicts from a frame of strings (much faster than to_dict("records"))."""
+    columns = list(df.columns)
+    return [dict(zip(columns, values)) for values in zip(*(df[c].tolist() for c in columns))]
+
+
+def validate_rows(rows, reject_unknown=REJECT_UNKNOWN_DOMAIN_VALUES):
+    """
+    Validate and normalise a batch of phrase rows.
+
+    Args:
+        rows: iterable of dicts keyed by STANDARD_COLUMNS (missing keys -> "")
+        reject_unknown: reject rows with unmappable domain values instead of
+            clearing those values
+
+    Returns:
+        (valid_rows, rejected_rows, changes) - lists of dicts (rejected rows
+        carry a "Reason") and a Counter of corrected/cleared values by column
+    """
+    df = pd.DataFrame(list(rows), columns=STANDARD_COLUMNS)
+    changes = Counter()
+    if df.empty:
+        return [], [], changes
+
+    for col in STANDARD_COLUMNS:
+        df[col] = (
+            df[col].fillna("").astype(str)
+            .str.replace(r"\s+", " ", regex=True).str.strip()
+        )
+
+    lengths = df["Content"].str.len()
+    conditions = [lengths < MIN_CONTENT_LENGTH, lengths > MAX_CONTENT_LENGTH]
+    reasons = [
+        f"Content shorter than {MIN_CONTENT_LENGTH} characters",
+        f"Content longer than {MAX_CONTENT_LENGTH} characters",
+    ]
+
+    for col in _LOOKUPS:
+        mapping = {value: map_value(col, value) for value in df[col].unique()}
+        mapped = df[col].map(mapping)
+        unknown = mapped.isna().to_numpy()
+        changes[f"{col} corrected"] += int((~unknown & (mapped != df[col]).to_numpy()).sum())
+        if reject_unknown:
+            conditions.append(unknown)
+            reasons.append(f"Unknown {col}")
+        else:
+            changes[f"{col} cleared"] += int(unknown.sum())
+        df[col] = mapped.fillna("")
+
+    reason = np.select(conditions, reasons, default="")
+    rejected = reason != ""
+    changes = Counter({k: v for k, v in changes.items() if v})
+
+    valid_rows = _records(df[~rejected])
+    rejected_rows = _records(df[rejected].assign(Reason=reason[rejected]))
+    return valid_rows, rejected_rows, changes
+
+
+def write_rejections(rejected_rows, path=REJECTION_REPORT_FILE):
+    """Append rejected rows (with their Reason) to the rejection report."""
+    if not rejected_rows:
+        return
+    rejected_at = datetime.now().isoformat(timespec="seconds")
+    with open(path, "a", encoding="utf-8") as f:
+        for row in rejected_rows:
+            f.write(json.dumps(dict(row, Rejected_At=rejected_at), ensure_ascii=False) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phrase validation report.")
+    parser.add_argument("--check", action="store_true",
+                        help="Validate rows already in the phrase store (changes nothing)")
+    parser.add_argument("--report", default=REJECTION_REPORT_FILE, help="Rejection report path")
+    args = parser.parse_args()
+
+    if args.check:
+        import phrase_store
+        conn = phrase_store.connect()
+        try:
+            rows = [dict(zip(STANDARD_COLUMNS, row)) for row in phrase_store.iter_rows(conn)]
+        finally:
+            conn.close()
+        valid, rejected, changes = validate_rows(rows)
+        print(f"Checked {len(rows)} stored phrases: {len(valid)} valid, {len(rejected)} would be rejected")
+        for reason, count in Counter(r["Reason"] for r in rejected).most_common():
+            print(f"  {reason}: {count}")
+        for change, count in sorted(changes.items()):
+            print(f"  {change}: {count}")
+        return 0
+
+    if not os.path.exists(args.report):
+        print(f"No rejection report ({args.report}) - nothing has been rejected.")
+        return 0
+    with open(args.report, "r", encoding="utf-8") as f:
+        rejected = [json.loads(line) for line in f if line.strip()]
+    print(f"{len(rejected)} rejected row(s) in {args.report}")
+    for reason, count in Counter(r.get("Reason", "") for r in rejected).most_common():
+        print(f"  {reason}: {count}")
+    for (source, count) in Counter(r.get("Source_File", "") for r in rejected).most_common(10):
+        print(f"    {source or '(no source)'}: {count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
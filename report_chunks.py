@@ -0,0 +1,82 @@
+"""
+Report Chunks
+Splits long report text into chunks for the report miner.
+
+The text (with pdf_extract's "--- Page N ---" markers) is cut at every page
+marker and survey-section heading (REPORT_HEADING_PATTERN), and the pieces
+are packed in order into chunks of at most MINER_CHUNK_TOKENS estimated
+tokens. A piece that is too large on its own is split at line breaks, and
+a line that is still too large at spaces, so every character of the report
+lands in exactly one chunk. A chunk that starts mid-page is prefixed with
+"--- Page N (continued) ---" so the model keeps its bearings.
+"""
+
+import re
+from config import MINER_CHUNK_TOKENS, CHARS_PER_TOKEN, REPORT_HEADING_PATTERN
+
+PAGE_MARKER = re.compile(r"^--- Page (\d+) ---$", re.MULTILINE)
+HEADING = re.compile(REPORT_HEADING_PATTERN, re.MULTILINE)
+
+
+def _units(text):
+    """Split text at the start of every page marker and heading line."""
+    starts = {m.start() for m in PAGE_MARKER.finditer(text)}
+    starts.update(m.start() for m in HEADING.finditer(text))
+    starts.discard(0)
+    bounds = [0] + sorted(starts) + [len(text)]
+    for start, stop in zip(bounds, bounds[1:]):
+        if stop > start:
+            yield text[start:stop]
+
+
+def _split_oversized(unit, max_chars):
+    """Split a unit longer than max_chars at line breaks, then at spaces."""
+    if len(unit) <= max_chars:
+        yield unit
+        return
+    piece = ""
+    for line in unit.splitlines(keepends=True):
+        while len(line) > max_chars:
+            cut = line.rfind(" ", 0, max_chars) + 1 or max_chars
+            if piece:
+                yield piece
+                piece = ""
+            yield line[:cut]
+            line = line[cut:]
+        if piece and len(piece) + len(line) > max_chars:
+            yield piece
+            piece = ""
+        piece += line
+    if piece:
+        yield piece
+
+
+def chunk_report(text, token_budget=MINER_CHUNK_TOKENS):
+    """
+    Split report text into chunks of at most `token_budget` estimated tokens
+    (plus a short continuation marker).
+
+    Returns:
+        list of chunk strings, in report order (a single chunk for short reports)
+    """
+    max_chars = max(token_budget * CHARS_PER_TOKEN, 1)
+    chunks = []
+    current = []
+    size = 0
+    page = None
+    for unit in _units(text):
+        for piece in _split_oversized(unit, max_chars):
+            if current and size + len(piece) > max_chars:
+                chunks.append("".join(current))
+                current = []
+                size = 0
+            marker = PAGE_MARKER.match(piece)
+            if not current and not marker and page is not None:
+                current.append(f"--- Page {page} (continued) ---\n")
+            if marker:
+                page = int(marker.group(1))
+            current.append(piece)
+            size += len(piece)
+    if current:
+        chunks.append("".join(current))
+    return chunks
@@ -0,0 +1,149 @@
+"""
+Response Cache
+On-disk cache of model responses for the report miner.
+
+Entries are keyed by the SHA-256 of the whole request - model, temperature,
+max_tokens, system prompt and messages - so any change to the prompt, the
+reference material or the settings is a miss. The miner calls the model at
+temperature 0, so a cached response stands in for a repeat call: rerunning
+after a fix to the save path, or replaying with --cache-only, costs nothing.
+
+Only complete responses are stored. Entries expire RESPONSE_CACHE_TTL_DAYS
+after they were written; prune() also evicts least recently used entries
+until the cache fits RESPONSE_CACHE_MAX_MB.
+
+Run:
+    python response_cache.py stats              # Entries and size
+    python response_cache.py prune [--max-mb N] # Evict expired and least recently used entries
+    python response_cache.py clear              # Delete every entry
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from config import RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_MB, RESPONSE_CACHE_TTL_DAYS
+
+ENTRY_SUFFIX = ".json"
+DAY_SECONDS = 24 * 60 * 60
+
+
+class CacheMiss(Exception):
+    """Raised by the miner in --cache-only mode for a request that isn't cached."""
+
+
+def request_key(request):
+    """Cache key for a messages request (the keyword arguments of messages.create)."""
+    canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key, cache_dir=RESPONSE_CACHE_DIR):
+    return os.path.join(cache_dir, key[:2], f"{key}{ENTRY_SUFFIX}")
+
+
+def get(key, ttl_days=RESPONSE_CACHE_TTL_DAYS, cache_dir=RESPONSE_CACHE_DIR):
+    """
+    Return the cached response text or None. A hit marks the entry as
+    recently used; an expired entry is deleted.
+    """
+    path = _entry_path(key, cache_dir)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        if time.time() - entry["created_at"] > ttl_days * DAY_SECONDS:
+            os.remove(path)
+            return None
+        os.utime(path)
+        return entry["text"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def put(key, text, model="", cache_dir=RESPONSE_CACHE_DIR):
+    """Store a response. Safe to call from several threads/processes at once."""
+    path = _entry_path(key, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{time.time_ns()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": model, "created_at": time.time(), "text": text},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        # The cache is an optimisation only
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _entries(cache_dir=RESPONSE_CACHE_DIR):
+    """Yield (path, size, mtime) for every cache entry."""
+    if not os.path.isdir(cache_dir):
+        return
+    for shard in os.scandir(cache_dir):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.name.endswith(ENTRY_SUFFIX):
+                stat = entry.stat()
+                yield entry.path, stat.st_size, stat.st_mtime
+
+
+def prune(max_mb=RESPONSE_CACHE_MAX_MB, ttl_days=RESPONSE_CACHE_TTL_DAYS,
+          cache_dir=RESPONSE_CACHE_DIR):
+    """
+    Evict entries unused for longer than the TTL (so certainly expired), then
+    least recently used entries until the cache is under max_mb.
+
+    Returns:
+        (entries_removed, bytes_removed)
+    """
+    entries = sorted(_entries(cache_dir), key=lambda e: e[2])
+    total = sum(size for _, size, _ in entries)
+    limit = max_mb * 1024 * 1024
+    cutoff = time.time() - ttl_days * DAY_SECONDS
+    removed = 0
+    removed_bytes = 0
+    for path, size, mtime in entries:
+        if total <= limit and mtime >= cutoff:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+        removed_bytes += size
+    return removed, removed_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and prune the model response cache.")
+    parser.add_argument("command", choices=["stats", "prune", "clear"])
+    parser.add_argument("--max-mb", type=float, default=RESPONSE_CACHE_MAX_MB,
+                        help=f"Size limit for prune (default: {RESPONSE_CACHE_MAX_MB} MB)")
+    parser.add_argument("--dir", default=RESPONSE_CACHE_DIR, help="Cache directory")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        entries = list(_entries(args.dir))
+        total = sum(size for _, size, _ in entries)
+        print(f"Response cache: {os.path.abspath(args.dir)}")
+        print(f"Entries: {len(entries)}, size: {total / (1024 * 1024):.1f} MB "
+              f"(limit {RESPONSE_CACHE_MAX_MB} MB, entries expire after {RESPONSE_CACHE_TTL_DAYS} days)")
+
+    elif args.command == "prune":
+        removed, removed_bytes = prune(args.max_mb, cache_dir=args.dir)
+        print(f"✓ Evicted {removed} entries ({removed_bytes / (1024 * 1024):.1f} MB)")
+
+    elif args.command == "clear":
+        removed, removed_bytes = prune(0, cache_dir=args.dir)
+        print(f"✓ Cleared {removed} entries ({removed_bytes / (1024 * 1024):.1f} MB)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Run Log
+Per-report telemetry for mining runs (4_mine_reports.py).
+
+Each report gets one record, appended to MINER_RUN_LOG_FILE (JSON Lines) as
+soon as it finishes, so an interrupted run keeps what it did:
+
+- extraction: seconds, pages, characters, whether the text cache was hit
+- prompt: chunks, requests sent (after any budget split), tokens estimated
+  before sending
+- usage reported by the API: input, output and prompt cache tokens, calls,
+  responses served from the response cache, stop reasons
+- parsing: responses that weren't a JSON array, malformed phrases skipped
+- result: status (saved, failed, skipped or batched), error, rows journaled
+
+A "run" record with the totals (and what the store did with the rows) closes
+each run. The miner prints a summary table at the end; this script reprints
+it for any run in the log.
+
+Run:
+    python run_log.py               # Summary of the last run
+    python run_log.py --run RUN_ID  # Summary of an earlier run
+    python run_log.py --list        # Runs in the log
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+from datetime import datetime
+from config import MINER_RUN_LOG_FILE
+
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+# Reports listed in the summary table (largest first); the rest are in the log
+SUMMARY_ROWS = 20
+
+
+class CallMetrics:
+    """
+    Model-call metrics for one chunk of a report. Each chunk's worker thread
+    fills its own instance; the main thread combines them per report.
+    """
+
+    def __init__(self):
+        self.requests = 0                  # Requests built (more than one if split for budget)
+        self.estimated_prompt_tokens = 0   # Estimated before sending
+        self.over_budget = 0               # Prompts rejected as over MINER_MAX_PROMPT_TOKENS
+        self.api_calls = 0
+        self.cached_responses = 0
+        self.usage = dict.fromkeys(USAGE_FIELDS, 0)
+        self.stop_reasons = Counter()
+        self.unparsed = 0                  # Responses that weren't a JSON array
+        self.malformed_phrases = 0
+        self.seconds = 0.0
+
+    def record_usage(self, message):
+        """Record one API call from its final Message."""
+        self.api_calls += 1
+        for field in USAGE_FIELDS:
+            self.usage[field] += getattr(message.usage, field, None) or 0
+        self.stop_reasons[message.stop_reason or "unknown"] += 1
+
+    @classmethod
+    def combine(cls, parts):
+        total = cls()
+        for part in parts:
+            for name in ("requests", "estimated_prompt_tokens", "over_budget", "api_calls",
+                         "cached_responses", "unparsed", "malformed_phrases", "seconds"):
+                setattr(total, name, getattr(total, name) + getattr(part, name))
+            for field in USAGE_FIELDS:
+                total.usage[field] += part.usage[field]
+            total.stop_reasons.update(part.stop_reasons)
+        return total
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "estimated_prompt_tokens": self.estimated_prompt_tokens,
+            "over_budget": self.over_budget,
+            "api_calls": self.api_calls,
+            "cached_responses": self.cached_responses,
+            **self.usage,
+            "stop_reasons": dict(self.stop_reasons),
+            "unparsed": self.unparsed,
+            "malformed_phrases": self.malformed_phrases,
+            "model_seconds": round(self.seconds, 2),
+        }
+
+
+class RunLog:
+    """Appends the records of one mining run to the run log."""
+
+    def __init__(self, mode, path=MINER_RUN_LOG_FILE):
+        self.path = path
+        self.mode = mode
+        self.run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.records = []
+        self._start = time.time()
+
+    def report(self, job, status, metrics=None, error="", **fields):
+        """
+        Log a finished report. `fields` carries the extraction and result
+        figures (extract_seconds, pages, characters, chunks, rows_journaled,
+        ...).
+        """
+        record = {
+            "type": "report",
+            "run_id": self.run_id,
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "file": job["filename"],
+            "file_hash": job["file_hash"],
+            "status": status,
+            "error": error,
+            **fields,
+        }
+        if metrics is not None:
+            record.update(metrics.as_dict())
+        self.records.append(record)
+        self._write(record)
+        return record
+
+    def finish(self, **totals):
+        """Log the run totals (e.g. what compaction did with the rows)."""
+        record = {
+            "type": "run",
+            "run_id": self.run_id,
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "mode": self.mode,
+            "seconds": round(time.time() - self._start, 1),
+            "reports": len(self.records),
+            "statuses": dict(Counter(r["status"] for r in self.records)),
+            **_totals(self.records),
+            **totals,
+        }
+        self._write(record)
+        return record
+
+    def _write(self, record):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _totals(records):
+    totals = Counter()
+    for record in records:
+        for name in ("estimated_prompt_tokens", "api_calls", "cached_responses",
+                     "rows_journaled", *USAGE_FIELDS):
+            totals[name] += record.get(name) or 0
+    return dict(totals)
+
+
+def prompt_tokens(record):
+    """Actual prompt tokens of a record: uncached plus cache reads and writes."""
+    return sum(record.get(field) or 0 for field in USAGE_FIELDS if field != "output_tokens")
+
+
+def _format_stops(stop_reasons):
+    return " ".join(f"{reason}" if n == 1 else f"{reason}x{n}"
+                    for reason, n in sorted((stop_reasons or {}).items())) or "-"
+
+
+def print_summary(records, top=SUMMARY_ROWS):
+    """Print the per-report table (largest reports first) and the run totals."""
+    if not records:
+        print("No reports in this run.")
+        return
+    rows = sorted(records, key=lambda r: prompt_tokens(r) + (r.get("output_tokens") or 0),
+                  reverse=True)
+    header = (f"{'Report':<32} {'Status':<8} {'Calls':>5} {'Extract':>8} {'Est.in':>8} "
+              f"{'Prompt':>8} {'Output':>7} {'Rows':>5}  Stop")
+    print(header)
+    print("-" * len(header))
+    for r in rows[:top]:
+        name = r["file"] if len(r["file"]) <= 32 else r["file"][:29] + "..."
+        print(f"{name:<32} {r['status']:<8} {r.get('api_calls', 0):>5} "
+              f"{r.get('extract_seconds', 0):>7.1f}s {r.get('estimated_prompt_tokens', 0):>8} "
+              f"{prompt_tokens(r):>8} {r.get('output_tokens', 0):>7} "
+              f"{r.get('rows_journaled', 0):>5}  {_format_stops(r.get('stop_reasons'))}")
+    if len(rows) > top:
+        print(f"... and {len(rows) - top} more")
+    print("-" * len(header))
+
+    totals = _totals(records)
+    statuses = Counter(r["status"] for r in records)
+    print(f"{len(records)} report(s): " + ", ".join(f"{n} {s}" for s, n in sorted(statuses.items())))
+    print(f"Tokens: ~{totals['estimated_prompt_tokens']} estimated before sending, "
+          f"{prompt_tokens(totals)} prompt and {totals['output_tokens']} output reported "
+          f"({totals['api_calls']} API calls, {totals['cached_responses']} cached responses)")
+
+    cut_off = [r["file"] for r in records if (r.get("stop_reasons") or {}).get("max_tokens")]
+    if cut_off:
+        print(f"Hit max_tokens: {len(cut_off)} report(s): {', '.join(cut_off[:10])}"
+              + (" ..." if len(cut_off) > 10 else ""))
+    unparsed = [r["file"] for r in records if r.get("unparsed")]
+    if unparsed:
+        print(f"Unparseable output: {len(unparsed)} report(s): {', '.join(unparsed[:10])}"
+              + (" ..." if len(unparsed) > 10 else ""))
+    over_budget = [r["file"] for r in records if r.get("over_budget")]
+    if over_budget:
+        print(f"Over the prompt budget: {len(over_budget)} report(s): {', '.join(over_budget[:10])}"
+              + (" ..." if len(over_budget) > 10 else ""))
+
+
+def load(path=MINER_RUN_LOG_FILE):
+    """Read the run log; returns {run_id: [records]} in log order."""
+    runs = {}
+    if not os.path.exists(path):
+        return runs
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn line from an interrupted write
+            runs.setdefault(record.get("run_id"), []).append(record)
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize mining runs from the run log.")
+    parser.add_argument("--run", help="Run ID (default: the last run)")
+    parser.add_argument("--list", action="store_true", help="List the runs in the log")
+    parser.add_argument("--file", default=MINER_RUN_LOG_FILE, help="Run log file")
+    args = parser.parse_args()
+
+    runs = load(args.file)
+    if not runs:
+        print(f"No runs logged in {args.file}")
+        return 1
+
+    if args.list:
+        for run_id, records in runs.items():
+            reports = [r for r in records if r["type"] == "report"]
+            end = next((r for r in records if r["type"] == "run"), None)
+            detail = f"{end['mode']}, {end['seconds']}s" if end else "interrupted"
+            print(f"{run_id}  {len(reports):>5} report(s)  ({detail})")
+        return 0
+
+    run_id = args.run or list(runs)[-1]
+    if run_id not in runs:
+        print(f"No run {run_id} in {args.file}")
+        return 1
+    print(f"Run {run_id}\n")
+    print_summary([r for r in runs[run_id] if r["type"] == "report"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Text Cache
+Content-addressed on-disk cache of extracted document text.
+
+Entries are keyed by the SHA-256 of the source file plus an extractor version
+string, so a renamed file still hits the cache and changing an extractor
+invalidates only its own entries. 2_import_word_docs.py, 3_build_knowledge_bank.py
+and 4_mine_reports.py look here before parsing a document.
+
+Eviction is least-recently-used: a hit refreshes the entry's mtime, and
+prune() deletes the oldest entries until the cache fits TEXT_CACHE_MAX_MB.
+
+Run:
+    python text_cache.py stats              # Entries, size, breakdown by extractor
+    python text_cache.py prune [--max-mb N] # Evict least recently used entries
+    python text_cache.py clear              # Delete every entry
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+from config import TEXT_CACHE_DIR, TEXT_CACHE_MAX_MB
+
+ENTRY_SUFFIX = ".json"
+
+
+def file_sha256(path):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _entry_path(file_hash, extractor, cache_dir=TEXT_CACHE_DIR):
+    return os.path.join(cache_dir, file_hash[:2], f"{file_hash}-{extractor}{ENTRY_SUFFIX}")
+
+
+def get(file_hash, extractor, cache_dir=TEXT_CACHE_DIR):
+    """
+    Return the cached extraction (a list of pages/paragraphs) or None.
+    A hit marks the entry as recently used.
+    """
+    path = _entry_path(file_hash, extractor, cache_dir)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        os.utime(path)
+        return entry["pages"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def put(file_hash, extractor, pages, source_name="", cache_dir=TEXT_CACHE_DIR):
+    """Store an extraction. Safe to call from several processes at once."""
+    path = _entry_path(file_hash, extractor, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"extractor": extractor, "source": source_name, "pages": pages},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        # The cache is an optimisation only
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def cached_extract(path, extractor, extract_fn, file_hash=None, cache_dir=TEXT_CACHE_DIR):
+    """
+    Return extract_fn(path), using the cache when possible.
+
+    extract_fn must return a JSON-serialisable list (pages or paragraphs).
+    Returns (pages, hit).
+    """
+    if file_hash is None:
+        file_hash = file_sha256(path)
+    pages = get(file_hash, extractor, cache_dir)
+    if pages is not None:
+        return pages, True
+    pages = extract_fn(path)
+    put(file_hash, extractor, pages, os.path.basename(path), cache_dir)
+    return pages, False
+
+
+def _entries(cache_dir=TEXT_CACHE_DIR):
+    """Yield (path, size, mtime) for every cache entry."""
+    if not os.path.isdir(cache_dir):
+        return
+    for shard in os.scandir(cache_dir):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.name.endswith(ENTRY_SUFFIX):
+                stat = entry.stat()
+                yield entry.path, stat.st_size, stat.st_mtime
+
+
+def prune(max_mb=TEXT_CACHE_MAX_MB, cache_dir=TEXT_CACHE_DIR):
+    """
+    Evict least recently used entries until the cache is under max_mb.
+
+    Returns:
+        (entries_removed, bytes_removed)
+    """
+    entries = sorted(_entries(cache_dir), key=lambda e: e[2])
+    total = sum(size for _, size, _ in entries)
+    limit = max_mb * 1024 * 1024
+    removed = 0
+    removed_bytes = 0
+    for path, size, _ in entries:
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+        removed_bytes += size
+    return removed, removed_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and prune the extracted-text cache.")
+    parser.add_argument("command", choices=["stats", "prune", "clear"])
+    parser.add_argument("--max-mb", type=float, default=TEXT_CACHE_MAX_MB,
+                        help=f"Size limit for prune (default: {TEXT_CACHE_MAX_MB} MB)")
+    parser.add_argument("--dir", default=TEXT_CACHE_DIR, help="Cache directory")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        by_extractor = {}
+        total = 0
+        count = 0
+        for path, size, _ in _entries(args.dir):
+            extractor = os.path.basename(path)[65:-len(ENTRY_SUFFIX)]
+            n, b = by_extractor.get(extractor, (0, 0))
+            by_extractor[extractor] = (n + 1, b + size)
+            total += size
+            count += 1
+        print(f"Text cache: {os.path.abspath(args.dir)}")
+        print(f"Entries: {count}, size: {total / (1024 * 1024):.1f} MB "
+              f"(limit {TEXT_CACHE_MAX_MB} MB)")
+        for extractor, (n, b) in sorted(by_extractor.items()):
+            print(f"  {extractor}: {n} entries, {b / (1024 * 1024):.1f} MB")
+
+    elif args.command == "prune":
+        removed, removed_bytes = prune(args.max_mb, args.dir)
+        print(f"✓ Evicted {removed} entries ({removed_bytes / (1024 * 1024):.1f} MB)")
+
+    elif args.command == "clear":
+        removed, removed_bytes = prune(0, args.dir)
+        print(f"✓ Cleared {removed} entries ({removed_bytes / (1024 * 1024):.1f} MB)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())